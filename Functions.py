@@ -1,33 +1,29 @@
 import re
-import math
-import numpy as np
-from numpy.fft import rfft, irfft
-from pydub import AudioSegment, effects
-from pydub.generators import WhiteNoise
-from pydub.silence import split_on_silence
-import parselmouth
-import logging
 from utils import resource_path
-from db import get_syllable_audio_path, populate_syllable_db
+from db import get_syllable_audio_path
 from Constants.abbreviations import abbrevs
 from Constants.acronyms import acr
 from Constants.symbols import symbols_to_remove, symbols_to_expand
 
+# კომპილირებული ცხრილები
+ABBREV_PATTERNS = [(re.compile(re.escape(abbrev)), expansion) for abbrev, expansion in abbrevs.items()]
+ACRONYM_RE = re.compile(r'\b(?:{})\b'.format("|".join(map(re.escape, sorted(acr, key=len, reverse=True)))))
+
 # აბრევიატურების გაშლა
 def expand_abbreviations(text):
     """Expands abbreviations in the text using the abbrevs dictionary."""
-    for abbrev, expansion in abbrevs.items():
-        pattern = re.escape(abbrev)
-        text = re.sub(pattern, expansion, text)
+    for pattern, expansion in ABBREV_PATTERNS:
+        text = pattern.sub(expansion, text)
     return text
 
 # აკრონიმების გაშლა
 def expand_acronyms(text):
-    """Expands acronyms in the text using the acr dictionary."""
-    for word in text.split():
-        if word in acr:
-            text = re.sub(rf'\b{re.escape(word)}\b', acr[word], text)
-    return text
+    """Expands acronyms in the text using the acr dictionary.
+
+    Every occurrence is expanded where it stands, so the result for one part of
+    a text does not depend on the rest of it.
+    """
+    return ACRONYM_RE.sub(lambda match: acr[match.group()], text)
 
 # სიმბოლოების გაშლა
 def expand_symbols(text):
@@ -215,7 +211,17 @@ def normalize_text(text):
 
 
 def preprocess_and_syllabify(text):
-    text = normalize_text(text)
+    return syllabify_normalized(normalize_text(text))
+
+def syllabify_chunks(chunks):
+    """Worker for the parallel frontend: the syllable stream of consecutive text chunks."""
+    syllables = []
+    for chunk in chunks:
+        syllables.extend(preprocess_and_syllabify(chunk))
+    return syllables
+
+def syllabify_normalized(text):
+    """Syllabify already-normalized text, marking word ("<s>") and sentence ("<eos>") ends."""
     words = text.split()
     all_syllables = []
     
@@ -237,30 +243,184 @@ def preprocess_and_syllabify(text):
     
     return all_syllables
 
-def synthesize_speech(syllables, db_path=None):
+WORD_SPAN_RE = re.compile(r'\S+')
+STRIP_CHARS_RE = re.compile(r'[.,!?;:"„"–]')
+
+def iter_syllable_spans(text):
+    """Yield (syllable, start, end) for normalized text; start/end index the characters
+    of `text` a syllable came from. Word and sentence markers span their whole word.
+
+    Yields the same syllables as syllabify_normalized, which stays a separate
+    loop because it is on the hot path.
+    """
+    for match in WORD_SPAN_RE.finditer(text):
+        word = match.group()
+        has_eos = bool(re.search(r'[.!?]$', word))
+
+        word_clean = STRIP_CHARS_RE.sub('', word)
+
+        if not word_clean:
+            continue
+
+        sylls = syllabify_georgian(word_clean)
+        # Positions in `text` of the characters kept in word_clean
+        if len(word_clean) == len(word):
+            kept = None
+        else:
+            kept = [match.start() + i for i, ch in enumerate(word) if not STRIP_CHARS_RE.match(ch)]
+        offset = 0
+        for syl in sylls:
+            if kept is None:
+                start = match.start() + offset
+                end = start + len(syl)
+            else:
+                start, end = kept[offset], kept[offset + len(syl) - 1] + 1
+            yield syl, start, end
+            offset += len(syl)
+
+        yield ("<eos>" if has_eos else "<s>"), match.start(), match.end()
+
+# ტექსტის ნაწილებად დაყოფა
+SENTENCE_PUNCTUATION = ".,!?;:"
+SAFE_CUT_RE = re.compile(rf'\s+(?=[^\s{re.escape(SENTENCE_PUNCTUATION)}])')
+
+def starts_safely(text):
+    """True if normalization would not pull `text` back onto the previous chunk"""
+    stripped = text.lstrip()
+    return bool(stripped) and stripped[0] not in SENTENCE_PUNCTUATION
+
+def iter_text_chunks(parts, max_chars=4000):
+    """Group paragraphs (a string or an iterable of lines) into chunks of about `max_chars`.
+
+    Chunks are only cut at whitespace followed by a character that normalization
+    never joins to the preceding text, so normalizing chunk by chunk yields the
+    same tokens as normalizing the whole text.
+    """
+    if isinstance(parts, str):
+        parts = (match.group() for match in re.finditer(r'[^\n]+', parts))
+    buffer = ""
+    for part in parts:
+        if buffer and len(buffer) >= max_chars and starts_safely(part):
+            yield buffer
+            buffer = part
+        else:
+            buffer = f"{buffer}\n{part}" if buffer else part
+        # Split one long paragraph at the last safe cut before max_chars
+        while len(buffer) > 2 * max_chars:
+            cut = None
+            for match in SAFE_CUT_RE.finditer(buffer, 1, max_chars):
+                cut = match
+            if cut is None:
+                break
+            yield buffer[:cut.start()]
+            buffer = buffer[cut.end():]
+    if buffer:
+        yield buffer
+
+# ნაკადური ნორმალიზაცია
+SENTENCE_END_RE = re.compile(r'[.!?]$')
+
+def iter_text_pieces(source, chunk_chars=4096):
+    """Pieces of a text given as a string, a file-like object (read in `chunk_chars`
+    pieces) or an iterable of strings such as the lines of a file. The pieces are
+    consecutive parts of one text, so lines keep their newlines."""
+    if isinstance(source, str):
+        for start in range(0, len(source), chunk_chars):
+            yield source[start:start + chunk_chars]
+    elif hasattr(source, "read"):
+        while True:
+            piece = source.read(chunk_chars)
+            if not piece:
+                return
+            yield piece
+    else:
+        yield from source
+
+def iter_normalized_chunks(source, chunk_chars=4096):
+    """Normalize a text piece by piece (see iter_text_pieces).
+
+    Each buffer is cut at its last safe cut (SAFE_CUT_RE) and the tail is
+    carried over to the next piece, so an abbreviation, a number like
+    "1,000,000" or a hyphenated word is never split, and punctuation never
+    lands after a cut it would have been pulled back across. No normalization
+    pass matches across such a cut, so joining the non-empty results with
+    spaces gives exactly normalize_text() of the whole text. Memory is bounded
+    by `chunk_chars` plus the longest run of text without a safe cut.
+    """
+    carry = ""
+    for piece in iter_text_pieces(source, chunk_chars):
+        buffer = carry + piece
+        # The carry has no safe cut of its own, except possibly in its trailing whitespace
+        cut = None
+        for match in SAFE_CUT_RE.finditer(buffer, len(carry.rstrip())):
+            cut = match
+        if cut is None:
+            carry = buffer
+            continue
+        normalized = normalize_text(buffer[:cut.start()])
+        if normalized:
+            yield normalized
+        carry = buffer[cut.end():]
+    normalized = normalize_text(carry)
+    if normalized:
+        yield normalized
+
+def iter_normalized_sentences(source, chunk_chars=4096):
+    """Yield normalized sentences of a text read piece by piece from a string, file or
+    iterable of lines. Joining them with spaces gives normalize_text() of the whole text."""
+    words = []
+    for chunk in iter_normalized_chunks(source, chunk_chars):
+        for word in chunk.split():
+            words.append(word)
+            if SENTENCE_END_RE.search(word):
+                yield " ".join(words)
+                words = []
+    if words:
+        yield " ".join(words)
+
+def split_sentences(syllables):
+    """Split a syllable stream into sentences, each ending with its "<eos>" marker."""
+    sentence = []
+    for syl in syllables:
+        sentence.append(syl)
+        if syl == "<eos>":
+            yield sentence
+            sentence = []
+    if sentence:
+        yield sentence
+
+def prepare_segment(path):
+    """Load a unit recording: normalize, high-pass, trim trailing silence and fade the edges."""
+    # pydub probes for ffmpeg on import, so audio modules load on first use only
+    from pydub import AudioSegment, effects
+    from pydub.silence import split_on_silence
+
+    seg = AudioSegment.from_wav(path)
+    seg = effects.normalize(seg).high_pass_filter(20)
+    chunks = split_on_silence(seg, min_silence_len=15, silence_thresh=-45, keep_silence=0)
+    seg = chunks[0] if chunks else seg
+    return seg.fade_in(5).fade_out(5)
+
+def synthesize_speech(syllables, db_path=None, word_pause_ms=100, sentence_pause_ms=400):
+    from pydub import AudioSegment
+    from pydub.generators import WhiteNoise
+
     if db_path is None:
         db_path = resource_path("tts_syllables.db")
 
     def simple_crossfade(a, b, duration_ms=15):
         return a.append(b, crossfade=duration_ms)
 
-    def prepare_segment(path):
-        seg = AudioSegment.from_wav(path)
-        seg = effects.normalize(seg).high_pass_filter(20)
-        chunks = split_on_silence(seg, min_silence_len=15, silence_thresh=-45, keep_silence=0)
-        seg = chunks[0] if chunks else seg
-        return seg.fade_in(5).fade_out(5)
-
     output = AudioSegment.empty()
     
     for i, syl in enumerate(syllables):
         if syl == "<s>":
             if len(output) > 0:
-                output = output + AudioSegment.silent(duration=100)
+                output = output + AudioSegment.silent(duration=word_pause_ms)
             continue
         if syl == "<eos>":
             if len(output) > 0:
-                output = output + AudioSegment.silent(duration=400)
+                output = output + AudioSegment.silent(duration=sentence_pause_ms)
             continue
 
         path = get_syllable_audio_path(syl, db_path)
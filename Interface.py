@@ -8,6 +8,7 @@ os.environ["TMP"] = custom_temp
 import shutil
 import uuid
 import time
+import multiprocessing
 from pathlib import Path
 import subprocess
 
@@ -19,27 +20,15 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtGui import QAction, QFont,  QColor, QTextCursor, QTextCharFormat
 
-from Functions import preprocess_and_syllabify, synthesize_speech
+from engine import get_engine, WavSink, SentenceCache
+from tracing import trace, span
 from db import populate_syllable_db, get_syllable_audio_path
+from readers import iter_document, has_module, HAS_PDF, HAS_DOCX
+from highlighter import GeorgianValidator
 from utils import resource_path
 
 
-def safe_import(module_name, package_name=None):
-    """Safely import optional dependencies"""
-    try:
-        if package_name:
-            return __import__(module_name, fromlist=[package_name])
-        return __import__(module_name)
-    except ImportError:
-        return None
-
-pydub = safe_import('pydub')
-PyPDF2 = safe_import('PyPDF2')
-docx = safe_import('docx')
-
-HAS_PYDUB = pydub is not None
-HAS_PDF = PyPDF2 is not None
-HAS_DOCX = docx is not None
+HAS_PYDUB = has_module('pydub')
 
 # === Constants ===
 DEFAULT_FONT_FAMILY = "Sylfaen"
@@ -53,6 +42,7 @@ INPUT_LABEL_FONT_WEIGHT = QFont.Weight.Bold
 STATUS_BAR_HEIGHT = 25
 AUDIO_FILE_NAME = "georgian_audio.wav"
 AUDIO_FORMAT = "wav"
+SPEEDS = [0.75, 0.9, 1.0, 1.15, 1.3, 1.5]
 SAMPLE_TEXT = """
 საქართველო არის ქვეყანა კავკასიაში.
 თბილისი არის საქართველოს დედაქალაქი.
@@ -100,6 +90,7 @@ STRINGS = {
     "generate_audio": "🎵 აუდიოს გენერაცია",
     "play_audio": "▶️ აუდიოს გაშვება",
     "save_audio": "💾 აუდიოს შენახვა",
+    "speed": "სიჩქარე:",
     "missing_deps": "Missing Dependencies:",
     "pydub_missing": "pydub not installed",
     "pdf_missing": "PyPDF2 not installed",
@@ -109,6 +100,7 @@ STRINGS = {
     "status_georgian_off": "Georgian mode: OFF",
     "status_font_changed": "Font changed to {font}",
     "status_loaded": "ჩაიტვირთა: {file}",
+    "status_loading": "⏳ იტვირთება: {file} ({parts})",
     "status_text_cleared": "ტექსტი წაშლილია",
     "status_sample_inserted": "Sample text inserted",
     "status_db": "⏳ მიმდინარეობს syllable DB-ს შექმნა...",
@@ -116,6 +108,7 @@ STRINGS = {
     "status_missing_syllables": "⚠️ მონაცემთა ბაზაში არ არსებობს მარცვლები",
     "status_audio_gen": "🎛️ აუდიოს გენერაცია...",
     "status_audio_success": "✅ აუდიო წარმატებით შეიქმნა!",
+    "status_audio_timing": "✅ {timing}",
     "status_audio_error": "❌ აუდიოს გენერაციისას მოხდა შეცდომა",
     "status_playing": "▶️ მიმდინარეობს აუდიოს გაშვება...",
     "status_play_done": "▶️ გაშვება დასრულდა",
@@ -126,6 +119,8 @@ STRINGS = {
     "warning_enter_text": "გთხოვთ შეიყვანოთ ტექსტი",
     "warning_generate_audio": "გთხოვთ, ჯერ დააგენერიროთ აუდიო",
     "warning_missing_syllables": "არ მოიპოვება შემდეგი მარცვლები:\n{syllables}",
+    "warning_invalid_letters": "ტექსტი შეიცავს არაქართულ ასოებს (ხაზი:სვეტი): {locations}",
+    "line": "ხაზი",
     "warning_clear_text": "გსურთ ტექსტის წაშლა?",
     "success": "წარმატება",
     "error": "შეცდომა",
@@ -172,6 +167,33 @@ class AudioWorker(QThread):
             import traceback
             self.finished.emit(False, f"Audio playback error for file {self.audio_file}: {e}\n{traceback.format_exc()}")
 
+class DocumentLoader(QThread):
+    """Worker thread that streams document text so the UI can show it page by page"""
+    chunk = pyqtSignal(str)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, file_path):
+        super().__init__()
+        self.file_path = file_path
+        self.error = None
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            for part in iter_document(self.file_path):
+                if self._cancelled:
+                    return
+                self.chunk.emit(part)
+        except ImportError as ie:
+            self.error = str(ie)
+            self.failed.emit("import", self.error)
+        except Exception as e:
+            self.error = str(e)
+            self.failed.emit("value", self.error)
+
 class GeorgianTextEdit(QPlainTextEdit):
     """Custom text edit with Georgian input and context menu"""
     
@@ -335,6 +357,8 @@ class ModernGeorgianTTS(QMainWindow):
         
         # Audio worker thread
         self.audio_worker = None
+        # Document loader thread
+        self.document_loader = None
         
         self.init_ui()
     
@@ -386,6 +410,7 @@ class ModernGeorgianTTS(QMainWindow):
 
         # Text editor
         self.text_edit = self.create_text_editor()
+        self.validator = GeorgianValidator(self.text_edit.document(), frozenset(get_engine().inventory))
         layout.addWidget(self.text_edit)
 
         # Controls
@@ -473,6 +498,7 @@ class ModernGeorgianTTS(QMainWindow):
         if HAS_PYDUB:
             audio_buttons.insert(-1, (STRINGS["play_audio"], self.play_audio))
         self.add_section(layout, STRINGS["audio_gen"], audio_buttons)
+        layout.addLayout(self.create_speed_layout())
 
         # Show missing dependencies
         self.add_missing_deps_info(layout)
@@ -480,6 +506,19 @@ class ModernGeorgianTTS(QMainWindow):
         layout.addStretch()
         return frame
 
+    def create_speed_layout(self):
+        """Speaking-rate selector"""
+        speed_layout = QHBoxLayout()
+        speed_layout.addWidget(QLabel(STRINGS["speed"]))
+        self.speed_combo = QComboBox()
+        for speed in SPEEDS:
+            self.speed_combo.addItem(f"{speed:g}x", speed)
+        self.speed_combo.setCurrentIndex(SPEEDS.index(1.0))
+        self.speed_combo.setFixedWidth(80)
+        speed_layout.addWidget(self.speed_combo)
+        speed_layout.addStretch()
+        return speed_layout
+
     def add_section(self, parent_layout, title, buttons):
         label = self.create_section_label(title)
         parent_layout.addWidget(label)
@@ -539,44 +578,45 @@ class ModernGeorgianTTS(QMainWindow):
         )
         if not file_path:
             return
-        try:
-            content = self.read_file_content(file_path)
-            self.text_edit.setPlainText(content)
-            self.status_label.setText(STRINGS["status_loaded"].format(file=os.path.basename(file_path)))
-        except ValueError as ve:
-            QMessageBox.critical(self, STRINGS["error"], f"Could not load file:\n{str(ve)}")
-        except ImportError as ie:
-            QMessageBox.critical(self, STRINGS["missing_dependency"], f"{str(ie)}\nPlease install the required package.")
-        except Exception as e:
-            QMessageBox.critical(self, STRINGS["error"], f"Could not load file:\n{str(e)}")
+        if self.document_loader and self.document_loader.isRunning():
+            self.document_loader.cancel()
+            self.document_loader.wait()
+        self.text_edit.clear()
+        self.loaded_parts = 0
+        self.document_loader = DocumentLoader(file_path)
+        self.document_loader.chunk.connect(self.on_document_chunk)
+        self.document_loader.failed.connect(self.on_document_failed)
+        self.document_loader.finished.connect(self.on_document_loaded)
+        self.document_loader.start()
+
+    def on_document_chunk(self, text):
+        """Append one extracted page/paragraph to the editor"""
+        if self.sender() is not self.document_loader:
+            return
+        if self.loaded_parts == 0:
+            self.text_edit.setPlainText(text)
+        else:
+            self.text_edit.appendPlainText(text)
+        self.loaded_parts += 1
+        self.status_label.setText(STRINGS["status_loading"].format(
+            file=os.path.basename(self.document_loader.file_path), parts=self.loaded_parts))
+
+    def on_document_loaded(self):
+        """Report that the whole document has been loaded"""
+        loader = self.sender()
+        if loader is self.document_loader and not loader.error:
+            self.status_label.setText(STRINGS["status_loaded"].format(file=os.path.basename(loader.file_path)))
+
+    def on_document_failed(self, kind, message):
+        """Report a document loading error"""
+        if kind == "import":
+            QMessageBox.critical(self, STRINGS["missing_dependency"], f"{message}\nPlease install the required package.")
+        else:
+            QMessageBox.critical(self, STRINGS["error"], f"Could not load file:\n{message}")
 
     def read_file_content(self, file_path):
         """Read content from different file types"""
-        file_ext = Path(file_path).suffix.lower()
-        if file_ext == '.txt':
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return f.read()
-            except Exception as e:
-                raise ValueError(f"Could not read text file: {e}")
-        elif file_ext == '.pdf':
-            if not HAS_PDF or PyPDF2 is None:
-                raise ImportError("PyPDF2 is required to open PDF files.")
-            try:
-                reader = PyPDF2.PdfReader(file_path)
-                return "\n".join(page.extract_text() or "" for page in reader.pages)
-            except Exception as e:
-                raise ValueError(f"Could not read PDF file: {e}")
-        elif file_ext == '.docx':
-            if not HAS_DOCX or docx is None:
-                raise ImportError("python-docx is required to open DOCX files.")
-            try:
-                doc = docx.Document(file_path)
-                return "\n".join(para.text for para in doc.paragraphs)
-            except Exception as e:
-                raise ValueError(f"Could not read DOCX file: {e}")
-        else:
-            raise ValueError(f"Unsupported file format: {file_ext}")
+        return "\n".join(iter_document(file_path))
     
     def clear_text(self):
         """Clear all text after confirmation"""
@@ -604,38 +644,41 @@ class ModernGeorgianTTS(QMainWindow):
         if not text:
             QMessageBox.warning(self, STRINGS["warning_enter_text"], STRINGS["warning_enter_text"])
             return
-        for char in text:
-            if char.isalpha():
-                if char not in Georgian_Alphabet[0]:
-                    QMessageBox.warning(self, STRINGS["warning_enter_text"], STRINGS["warning_enter_text"])
-                    return
+        issues = self.validator.collect_issues()
+        if issues.invalid_letters:
+            locations = ", ".join(f"{line}:{col}" for line, col in issues.invalid_letters[:10])
+            QMessageBox.warning(self, STRINGS["warning_enter_text"],
+                                STRINGS["warning_invalid_letters"].format(locations=locations))
+            return
 
-        
         try:
-            self.status_label.setText(STRINGS["status_db"])
-            QApplication.processEvents()
-            populate_syllable_db()
-            self.status_label.setText(STRINGS["status_preprocess"])
-            QApplication.processEvents()
-            # Use preprocess_and_syllabify and synthesize_speech as in the current Functions.py
-            syllables = preprocess_and_syllabify(text)
-            # Check for missing syllables before synthesis
-            from db import get_syllable_audio_path
-            missing = set()
-            for syl in syllables:
-                if syl == "<s>" or syl == "<eos>":
-                    continue
-                if not get_syllable_audio_path(syl):
-                    missing.add(syl)
-            if missing:
-                missing_str = ", ".join(sorted(missing))
-                QMessageBox.warning(self, STRINGS["warning_missing_syllables"],
-                                    STRINGS["warning_missing_syllables"].format(syllables=missing_str))
-                return
-                        
-            audio = synthesize_speech(syllables)
-            audio.export(self.audio_file, format="wav")
-            self.status_label.setText(STRINGS["status_audio_success"])
+            with trace("generate", sinks=[]) as request_trace:
+                self.status_label.setText(STRINGS["status_db"])
+                QApplication.processEvents()
+                with span("populate_db"):
+                    populate_syllable_db()
+                self.status_label.setText(STRINGS["status_preprocess"])
+                QApplication.processEvents()
+                syllables = get_engine().frontend(text)
+                # Check for missing syllables before synthesis
+                missing = get_engine().missing_syllables(syllables)
+                if missing:
+                    missing_str = ", ".join(
+                        f"{syl} ({STRINGS['line']} {', '.join(map(str, issues.missing[syl]))})"
+                        if syl in issues.missing else syl
+                        for syl in sorted(missing)
+                    )
+                    QMessageBox.warning(self, STRINGS["warning_missing_syllables"],
+                                        STRINGS["warning_missing_syllables"].format(syllables=missing_str))
+                    return
+
+                # Blocks go straight to the WAV file, so long texts render in bounded memory;
+                # repeated sentences (page headers and footers of PDFs) are assembled once
+                with WavSink(self.audio_file) as sink:
+                    get_engine().render_to_sink(syllables, sink, speed=self.speed_combo.currentData(),
+                                                sentence_cache=SentenceCache())
+            # Per-stage timing breakdown for this generation
+            self.status_label.setText(STRINGS["status_audio_timing"].format(timing=request_trace.summary()))
             QMessageBox.information(self, STRINGS["success"], STRINGS["status_audio_success"])
         except Exception as e:
             self.status_label.setText(STRINGS["status_audio_error"])
@@ -707,6 +750,12 @@ class ModernGeorgianTTS(QMainWindow):
         if self.audio_worker and self.audio_worker.isRunning():
             self.audio_worker.terminate()
             self.audio_worker.wait()
+
+        if self.document_loader and self.document_loader.isRunning():
+            self.document_loader.cancel()
+            self.document_loader.wait()
+
+        self.validator.stop()
         
         if os.path.exists(self.audio_file):
             try:
@@ -726,4 +775,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Frozen builds: PDF extraction workers must not start another copy of the GUI
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -1,11 +1,23 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+import sys
+
+# The prepared unit inventory ships with the app, so the frozen GUI never prepares
+# units at runtime. Building it here (same as `python inventory.py build`) keeps
+# it current with AudioDB; only new or changed recordings are processed.
+sys.path.insert(0, SPECPATH)
+from inventory import build_inventory, INVENTORY_DB
+
+inventory = build_inventory(os.path.join(SPECPATH, 'AudioDB'), os.path.join(SPECPATH, INVENTORY_DB))
+if inventory['failed']:
+    raise SystemExit(f"inventory build failed for {sorted(inventory['failed'])}")
 
 
 a = Analysis(
     ['Interface.py'],
     pathex=[],
     binaries=[],
-    datas=[('AudioDB', 'AudioDB'), ('tts_syllables.db', '.'), ('Constants', 'Constants')],
+    datas=[('AudioDB', 'AudioDB'), ('tts_syllables.db', '.'), (INVENTORY_DB, '.'), ('Constants', 'Constants')],
     hiddenimports=['PyQt6', 'PyQt6.QtWidgets', 'PyQt6.QtCore', 'PyQt6.QtGui', 'PyPDF2', 'docx'],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,148 @@
+"""Sample-accurate alignment of synthesized audio with its text.
+
+The engine records every unit and pause it places in the output while it
+concatenates (see SynthesisEngine.synthesize_aligned). An Alignment maps each
+entry to its span in the normalized text and its first/last output sample, and
+groups entries into words and sentences for seeking, partial replay,
+highlighting and subtitle export (JSON, WebVTT, SRT).
+"""
+import json
+
+import numpy as np
+
+from inventory import SAMPLE_RATE
+
+# === Constants ===
+WORD_END = "<s>"
+SENTENCE_END = "<eos>"
+UNIT, PAUSE, MISSING = "unit", "pause", "missing"
+
+
+class Alignment:
+    """Alignment entries in output order: (token, kind, text_start, text_end, sample_start, sample_end)"""
+
+    def __init__(self, text="", spans=None, sample_rate=SAMPLE_RATE):
+        self.text = text
+        self.spans = spans
+        self.sample_rate = sample_rate
+        self.entries = []
+        # Position in the syllable stream, also counting tokens that produced no audio
+        self.position = 0
+
+    def record(self, token, kind, start, end):
+        """Record the next syllable-stream token; start is None if it produced no samples"""
+        if start is not None:
+            text_start, text_end = self.spans[self.position] if self.spans is not None else (None, None)
+            self.entries.append((token, kind, text_start, text_end, start, end))
+        self.position += 1
+
+    def __len__(self):
+        return len(self.entries)
+
+    def as_arrays(self):
+        """Columns as NumPy arrays; text offsets are -1 where unknown"""
+        return {
+            "token": np.array([entry[0] for entry in self.entries], dtype=object),
+            "kind": np.array([entry[1] for entry in self.entries], dtype=object),
+            "text_start": np.array([-1 if entry[2] is None else entry[2] for entry in self.entries], dtype=np.int64),
+            "text_end": np.array([-1 if entry[3] is None else entry[3] for entry in self.entries], dtype=np.int64),
+            "sample_start": np.array([entry[4] for entry in self.entries], dtype=np.int64),
+            "sample_end": np.array([entry[5] for entry in self.entries], dtype=np.int64),
+        }
+
+    def _groups(self, boundaries):
+        """(text_start, text_end, sample_start, sample_end) of runs of units ended by a boundary token"""
+        groups = []
+        first = last = None
+        text_start = text_end = None
+        for token, kind, t_start, t_end, s_start, s_end in self.entries:
+            if kind != PAUSE:
+                if first is None:
+                    first = s_start
+                    text_start = t_start
+                last = s_end
+                if t_end is not None:
+                    text_end = t_end
+            if kind == PAUSE and token in boundaries:
+                # A boundary spans its whole word; extend the text to include its punctuation
+                if t_end is not None:
+                    text_end = t_end
+                if first is not None:
+                    groups.append((text_start, text_end, first, last))
+                first = last = text_start = text_end = None
+        if first is not None:
+            groups.append((text_start, text_end, first, last))
+        return groups
+
+    def words(self):
+        return self._groups((WORD_END, SENTENCE_END))
+
+    def sentences(self):
+        return self._groups((SENTENCE_END,))
+
+    def locate(self, sample):
+        """Index of the entry playing at `sample`, or None (e.g. for GUI highlighting)"""
+        starts = [entry[4] for entry in self.entries]
+        index = int(np.searchsorted(starts, sample, side="right")) - 1
+        if index >= 0 and sample < self.entries[index][5]:
+            return index
+        return None
+
+    def seek(self, sentence):
+        """(start, end) sample range of sentence number `sentence`"""
+        _, _, start, end = self.sentences()[sentence]
+        return start, end
+
+    def replay(self, samples, first, last=None):
+        """Samples of sentences `first`..`last` cut from the rendered output, without re-synthesis"""
+        sentences = self.sentences()
+        last = first if last is None else last
+        return samples[sentences[first][2]:sentences[last][3]]
+
+    def cue_text(self, text_start, text_end):
+        if text_start is None or text_end is None:
+            return ""
+        return self.text[text_start:text_end].strip()
+
+    def to_dict(self):
+        return {
+            "sample_rate": self.sample_rate,
+            "text": self.text,
+            "units": [
+                {"token": token, "kind": kind, "text_start": t_start, "text_end": t_end,
+                 "sample_start": s_start, "sample_end": s_end}
+                for token, kind, t_start, t_end, s_start, s_end in self.entries
+            ],
+            "words": [dict(zip(("text_start", "text_end", "sample_start", "sample_end"), word))
+                      for word in self.words()],
+            "sentences": [dict(zip(("text_start", "text_end", "sample_start", "sample_end"), sentence))
+                          for sentence in self.sentences()],
+        }
+
+    def to_json(self, indent=None):
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=indent)
+
+    def _cues(self, level):
+        groups = self.words() if level == "word" else self.sentences()
+        return [(start / self.sample_rate, end / self.sample_rate, self.cue_text(t_start, t_end))
+                for t_start, t_end, start, end in groups]
+
+    def to_webvtt(self, level="sentence"):
+        lines = ["WEBVTT", ""]
+        for start, end, text in self._cues(level):
+            lines += [f"{format_timestamp(start, '.')} --> {format_timestamp(end, '.')}", text, ""]
+        return "\n".join(lines)
+
+    def to_srt(self, level="sentence"):
+        lines = []
+        for number, (start, end, text) in enumerate(self._cues(level), 1):
+            lines += [str(number), f"{format_timestamp(start, ',')} --> {format_timestamp(end, ',')}", text, ""]
+        return "\n".join(lines)
+
+
+def format_timestamp(seconds, separator):
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{milliseconds:03d}"
@@ -0,0 +1,54 @@
+"""asyncio front end for the synthesis engine.
+
+synthesize_async() and stream_async() run the CPU stages in an executor (the
+loop's default one unless `executor` is given), one short step at a time, so
+the event loop stays responsive and a cancelled task stops at the next step
+instead of rendering the rest of the text. All callers share one engine and
+therefore its prepared units.
+
+    audio = await synthesize_async("გამარჯობა.")
+    async for segment in stream_async(text):
+        ...
+"""
+import asyncio
+
+import numpy as np
+
+from engine import get_engine, samples_to_segment, sentence_seed
+from Functions import split_sentences
+from tracing import bind
+
+# === Constants ===
+# Audio rendered per executor step of synthesize_async
+STEP_SECONDS = 1
+
+
+async def _run(executor, func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, bind(func), *args)
+
+
+async def synthesize_async(text, seed=None, rate=None, speed=1.0, pauses=None, engine=None, executor=None):
+    """Synthesize text into one AudioSegment, equal to engine.synthesize() for the same arguments"""
+    engine = engine if engine is not None else get_engine()
+    rate = rate or engine.sample_rate
+    syllables = await _run(executor, engine.frontend, text)
+    blocks = engine.render_blocks(syllables, seed, rate * STEP_SECONDS, rate, speed, pauses)
+    rendered = []
+    # Every await is a cancellation point; the generator is only ever advanced by one thread at a time
+    while True:
+        block = await _run(executor, next, blocks, None)
+        if block is None:
+            break
+        rendered.append(block)
+    samples = np.concatenate(rendered) if rendered else np.zeros(0, dtype=np.int16)
+    return samples_to_segment(samples, rate)
+
+
+async def stream_async(text, seed=None, rate=None, speed=1.0, pauses=None, engine=None, executor=None):
+    """Async iterator of one AudioSegment per sentence, like engine.synthesize_stream()"""
+    engine = engine if engine is not None else get_engine()
+    syllables = await _run(executor, engine.frontend, text)
+    for index, sentence in enumerate(split_sentences(syllables)):
+        yield await _run(executor, engine.synthesize_syllables, sentence, sentence_seed(seed, index), rate, speed,
+                         pauses)
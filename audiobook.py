@@ -0,0 +1,214 @@
+"""Audiobook mode: one audio file per chapter, rendered in parallel.
+
+Chapters come from DOCX heading styles or the PDF outline (see
+readers.read_chapters). Each chapter is rendered to its own WAV file in a
+process pool, longest chapters first, and index.json lists every chapter with
+its title, file, start time and duration, and how many repeated sentences
+were reused instead of rendered again. The index also keeps a hash of each
+chapter's text, so running again only renders chapters that changed or whose
+file is missing, and --chapter re-renders a single chapter.
+
+    python audiobook.py book.docx out/ --workers 8
+    python audiobook.py book.docx out/ --chapter 3
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from engine import get_engine, WavSink, SentenceCache, SAMPLE_RATE
+from readers import read_chapters
+
+# === Constants ===
+INDEX_FILE = "index.json"
+CHAPTER_FILE = "{:03d}.wav"
+UNTITLED = "შესავალი"
+
+
+def text_hash(parts):
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def render_chapter(parts, path, seed=None, rate=None, speed=1.0, frontend_workers=None):
+    """Worker: render one chapter to `path`; returns (samples, sentences reused). Runs in a separate process."""
+    tmp_path = f"{path}.part"
+    cache = SentenceCache()
+    try:
+        with WavSink(tmp_path, rate or SAMPLE_RATE) as sink:
+            samples = get_engine().synthesize_to_sink(parts, sink, seed, rate=rate, speed=speed, sentence_cache=cache,
+                                                       workers=frontend_workers)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return samples, cache.stats["reused"]
+
+
+def load_index(directory):
+    path = os.path.join(directory, INDEX_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_index(directory, index):
+    path = os.path.join(directory, INDEX_FILE)
+    with open(path + ".part", "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1, ensure_ascii=False)
+        f.write("\n")
+    os.replace(path + ".part", path)
+
+
+def render_audiobook(document, directory, workers=None, seed=None, rate=None, speed=1.0, chapters=None, force=False,
+                     progress=None, frontend_workers=None):
+    """Render the chapters of `document` into `directory` and write the index.
+
+    `chapters` limits rendering to those chapter numbers (1-based); other
+    chapters are rendered only if their file is missing or their text changed,
+    unless force=True. Returns the index dict. `frontend_workers` runs each
+    chapter's frontend in that many extra processes, which helps when there
+    are fewer chapters to render than workers.
+
+    With `chapters`, a chapter that was not selected but changed keeps its old
+    hash (and is listed under "outdated"), so the next full run still renders
+    it. The index is saved even if a chapter fails; failed chapters have no
+    samples and are rendered again next time.
+    """
+    os.makedirs(directory, exist_ok=True)
+    book = read_chapters(document, workers=workers)
+    previous = load_index(directory) or {}
+    settings = {"sample_rate": rate or SAMPLE_RATE, "speed": speed, "seed": seed}
+    same_settings = all(previous.get(key) == value for key, value in settings.items())
+    known = {entry["number"]: entry for entry in previous.get("chapters", [])} if same_settings else {}
+
+    entries = []
+    todo = []
+    outdated = []
+    for number, chapter in enumerate(book, 1):
+        entry = {
+            "number": number,
+            "title": chapter.title or UNTITLED,
+            "file": CHAPTER_FILE.format(number),
+            "characters": sum(len(part) for part in chapter.parts),
+            "text_sha1": text_hash(chapter.parts),
+        }
+        before = known.get(number)
+        exists = os.path.exists(os.path.join(directory, entry["file"]))
+        up_to_date = (before is not None and before.get("samples") is not None
+                      and before["text_sha1"] == entry["text_sha1"] and exists)
+        if chapters is not None:
+            stale = number in chapters
+        else:
+            stale = force or not up_to_date
+        if stale:
+            todo.append(number)
+        elif before is not None and before.get("samples") is not None and exists:
+            entry["samples"] = before["samples"]
+            entry["sentences_reused"] = before.get("sentences_reused", 0)
+            if not up_to_date:
+                entry["text_sha1"] = before["text_sha1"]
+                outdated.append(number)
+        entries.append(entry)
+    if chapters is not None:
+        missing = [entry["number"] for entry in entries if "samples" not in entry and entry["number"] not in todo]
+        if missing:
+            raise ValueError(f"chapters {missing} have not been rendered yet")
+
+    start = time.perf_counter()
+    # Longest chapters first, so the pool is not left waiting on one big chapter at the end
+    todo.sort(key=lambda number: -entries[number - 1]["characters"])
+    rendered = []
+    failed = []
+    try:
+        if todo:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(render_chapter, book[number - 1].parts,
+                                    os.path.join(directory, entries[number - 1]["file"]),
+                                    None if seed is None else seed + number, rate, speed, frontend_workers): number
+                    for number in todo
+                }
+                for done, future in enumerate(as_completed(futures), 1):
+                    number = futures[future]
+                    try:
+                        entries[number - 1]["samples"], entries[number - 1]["sentences_reused"] = future.result()
+                        rendered.append(number)
+                    except Exception as e:
+                        print(f"Error rendering chapter {number}: {e}")
+                        failed.append(number)
+                    if progress:
+                        progress(done, len(todo))
+    finally:
+        # Chapters that finished are kept even if others failed or the run was interrupted
+        index = build_index(document, settings, entries, rendered, outdated, time.perf_counter() - start)
+        save_index(directory, index)
+    if failed:
+        raise RuntimeError(f"chapters {sorted(failed)} failed to render")
+    return index
+
+
+def build_index(document, settings, entries, rendered, outdated, seconds):
+    sample_rate = settings["sample_rate"]
+    position = 0
+    for entry in entries:
+        if entry.get("samples") is None:
+            # Not rendered: no hash, so the next run renders it
+            entry.update(samples=None, text_sha1=None, start_s=None, duration_s=None)
+            continue
+        entry["start_s"] = round(position / sample_rate, 3)
+        entry["duration_s"] = round(entry["samples"] / sample_rate, 3)
+        position += entry["samples"]
+    return {
+        "document": os.path.abspath(document),
+        "title": Path(document).stem,
+        **settings,
+        "duration_s": round(position / sample_rate, 3),
+        "rendered": rendered,
+        "outdated": outdated,
+        "render_seconds": round(seconds, 2),
+        "chapters": entries,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a DOCX/PDF/TXT book chapter by chapter")
+    parser.add_argument("document")
+    parser.add_argument("directory")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chapter", type=int, action="append", help="re-render only this chapter (repeatable)")
+    parser.add_argument("--force", action="store_true", help="render every chapter")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--rate", type=int, default=None)
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--frontend-workers", type=int, default=None, help="frontend processes per chapter")
+    args = parser.parse_args(argv)
+
+    try:
+        index = render_audiobook(args.document, args.directory, args.workers, args.seed, args.rate, args.speed,
+                                 set(args.chapter) if args.chapter else None, args.force,
+                                 progress=lambda done, total: print(f"\r{done}/{total}", end="", file=sys.stderr),
+                                 frontend_workers=args.frontend_workers)
+    except (ImportError, ValueError, RuntimeError) as e:
+        print(f"Error: {e}")
+        return 1
+    print(file=sys.stderr)
+    for entry in index["chapters"]:
+        marker = "*" if entry["number"] in index["rendered"] else " "
+        print(f"{marker} {entry['number']:3d}  {entry['start_s']:9.1f} s  {entry['duration_s']:8.1f} s  {entry['title']}")
+    print(f"{len(index['rendered'])} rendered in {index['render_seconds']} s, total {index['duration_s']:.1f} s")
+    if index["outdated"]:
+        print(f"Chapters {index['outdated']} changed and were not re-rendered")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Benchmarks and measurement tools; run modules with `python -m benchmarks.<name>` from the repo root."""
@@ -0,0 +1,89 @@
+"""Throughput of the asyncio API under many concurrent callers.
+
+N tasks call synthesize_async at once on a shared engine. Reported: prompts per
+second against a sequential engine.synthesize loop, per-request latency
+percentiles, and the worst event-loop lag seen by a ticker task meanwhile,
+which shows whether the loop stayed responsive.
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.corpus import prompts
+from engine import SynthesisEngine
+from async_api import synthesize_async
+
+TICK_SECONDS = 0.01
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+async def ticker(lags, stop):
+    """Record how late each tick wakes up"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + TICK_SECONDS
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(loop.time() - expected)
+
+
+async def concurrent_run(engine, texts, executor):
+    latencies = []
+    lags = []
+    stop = asyncio.Event()
+
+    async def caller(text):
+        start = time.perf_counter()
+        await synthesize_async(text, engine=engine, executor=executor)
+        latencies.append(time.perf_counter() - start)
+
+    tick = asyncio.create_task(ticker(lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(caller(text) for text in texts))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+    return elapsed, latencies, lags
+
+
+def run(callers, workers):
+    texts = prompts(callers)
+    engine = SynthesisEngine()
+    engine.prepare(syl for text in texts for syl in engine.frontend(text))
+
+    start = time.perf_counter()
+    for text in texts:
+        engine.synthesize(text)
+    sequential = time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        elapsed, latencies, lags = asyncio.run(concurrent_run(engine, texts, executor))
+    return {
+        "callers": callers,
+        "workers": workers,
+        "sequential_prompts_per_s": round(callers / sequential, 1),
+        "async_prompts_per_s": round(callers / elapsed, 1),
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "latency_p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "latency_max_ms": round(max(latencies) * 1000, 1),
+        "max_loop_lag_ms": round(max(lags, default=0) * 1000, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--callers", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.callers, args.workers), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
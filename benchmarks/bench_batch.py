@@ -0,0 +1,60 @@
+"""Batch throughput: engine.synthesize_many vs one call per prompt.
+
+The per-call baseline is the legacy Functions.synthesize_speech path, measured on
+a sample of the prompts and extrapolated to the full batch.
+"""
+import sys
+import json
+import time
+import argparse
+
+from benchmarks.corpus import prompts
+from engine import SynthesisEngine
+from Functions import preprocess_and_syllabify, synthesize_speech
+
+
+def run(count, baseline_sample, workers):
+    texts = prompts(count)
+
+    start = time.perf_counter()
+    for text in texts[:baseline_sample]:
+        synthesize_speech(preprocess_and_syllabify(text))
+    baseline_per_prompt = (time.perf_counter() - start) / baseline_sample
+
+    engine = SynthesisEngine()
+    start = time.perf_counter()
+    for text in texts[:baseline_sample]:
+        engine.synthesize(text)
+    engine_per_call = (time.perf_counter() - start) / baseline_sample
+
+    engine = SynthesisEngine()
+    start = time.perf_counter()
+    outputs = engine.synthesize_many(texts, workers=workers)
+    batch_seconds = time.perf_counter() - start
+    audio_seconds = sum(len(audio) for audio in outputs) / 1000
+
+    return {
+        "prompts": count,
+        "baseline_sample": baseline_sample,
+        "units_prepared": len(engine.units),
+        "baseline_prompts_per_s": 1 / baseline_per_prompt,
+        "engine_per_call_prompts_per_s": 1 / engine_per_call,
+        "batch_prompts_per_s": count / batch_seconds,
+        "batch_seconds": batch_seconds,
+        "baseline_seconds_extrapolated": baseline_per_prompt * count,
+        "speedup_vs_baseline": baseline_per_prompt * count / batch_seconds,
+        "real_time_factor": batch_seconds / audio_seconds if audio_seconds else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prompts", type=int, default=10_000)
+    parser.add_argument("--baseline-sample", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.prompts, args.baseline_sample, args.workers), indent=2))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
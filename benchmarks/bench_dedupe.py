@@ -0,0 +1,76 @@
+"""Sentence deduplication on a report-like document.
+
+Every "page" of the corpus repeats a header and a footer and ends with one of a
+few boilerplate sentences, as PDF extraction of reports and legal documents
+does. The document is rendered with and without a SentenceCache; the output
+must be identical, and the report shows the time and work saved.
+"""
+import io
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+from contextlib import redirect_stdout
+
+from benchmarks.corpus import paragraphs, prompts, covered_vocabulary, DEFAULT_SEED
+from engine import SynthesisEngine, SentenceCache
+
+
+class HashSink:
+    def __init__(self):
+        self.digest = hashlib.sha256()
+        self.samples = 0
+
+    def write(self, samples):
+        self.digest.update(samples.tobytes())
+        self.samples += len(samples)
+
+
+def report_document(pages, seed=DEFAULT_SEED):
+    vocabulary = covered_vocabulary(seed=seed)
+    header, footer, *boilerplate = prompts(6, seed=seed + 1, vocabulary=vocabulary)
+    rng = random.Random(seed)
+    body = paragraphs(pages, seed=seed, vocabulary=vocabulary)
+    return [f"{header}\n{text} {rng.choice(boilerplate)}\n{footer}" for text in body]
+
+
+def timed_render(engine, parts, cache):
+    sink = HashSink()
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        engine.synthesize_to_sink(parts, sink, seed=1, sentence_cache=cache)
+    return time.perf_counter() - start, sink
+
+
+def run(pages):
+    parts = report_document(pages)
+    engine = SynthesisEngine()
+    engine.prepare(syl for part in parts for syl in engine.frontend(part))
+    plain_s, plain = timed_render(engine, parts, None)
+    cache = SentenceCache()
+    dedupe_s, deduped = timed_render(engine, parts, cache)
+    return {
+        "pages": pages,
+        "plain_s": round(plain_s, 3),
+        "dedupe_s": round(dedupe_s, 3),
+        "speedup": round(plain_s / dedupe_s, 2),
+        "identical_output": plain.digest.digest() == deduped.digest.digest(),
+        "samples_reused_fraction": round(cache.saved(), 3),
+        "cache_mb": round(cache.bytes / (1 << 20), 2),
+        **cache.stats,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=200)
+    args = parser.parse_args(argv)
+    report = run(args.pages)
+    print(json.dumps(report, indent=2))
+    return 0 if report["identical_output"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
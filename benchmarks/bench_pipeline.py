@@ -0,0 +1,63 @@
+"""Long-document latency: sequential synthesize_to_sink vs the threaded pipeline.
+
+Both write the same corpus to a WAV file starting from a cold unit cache. The
+report includes each pipeline stage's busy time, so the pipeline's wall time
+can be compared with the slowest stage and with the sum of all stages.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+from benchmarks.corpus import corpus
+from engine import SynthesisEngine, WavSink
+from pipeline import SynthesisPipeline
+
+SIZES = {"100KB": 100 << 10, "1MB": 1 << 20}
+
+
+def timed_run(func, path):
+    start = time.perf_counter()
+    with WavSink(path) as sink:
+        func(sink)
+    return time.perf_counter() - start
+
+
+def run(size, seed, queue_size):
+    text = corpus(SIZES[size])
+    with tempfile.TemporaryDirectory() as tmp:
+        sequential_path = os.path.join(tmp, "sequential.wav")
+        pipelined_path = os.path.join(tmp, "pipelined.wav")
+        sequential = timed_run(lambda sink: SynthesisEngine().synthesize_to_sink(text, sink, seed), sequential_path)
+        pipeline = SynthesisPipeline(SynthesisEngine(), queue_size=queue_size)
+        pipelined = timed_run(lambda sink: pipeline.run(text, sink, seed), pipelined_path)
+        with open(sequential_path, "rb") as a, open(pipelined_path, "rb") as b:
+            identical = a.read() == b.read()
+    busy = {stage: round(seconds, 3) for stage, seconds in pipeline.busy.items()}
+    return {
+        "corpus": size,
+        "sequential_s": round(sequential, 3),
+        "pipelined_s": round(pipelined, 3),
+        "speedup": round(sequential / pipelined, 2),
+        "stage_busy_s": busy,
+        "slowest_stage_s": max(busy.values()),
+        "sum_of_stages_s": round(sum(busy.values()), 3),
+        "identical_output": identical,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", choices=list(SIZES), default="100KB")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--queue-size", type=int, default=8)
+    args = parser.parse_args(argv)
+    report = run(args.size, args.seed, args.queue_size)
+    print(json.dumps(report, indent=2))
+    return 0 if report["identical_output"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
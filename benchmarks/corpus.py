@@ -0,0 +1,67 @@
+"""Reproducible synthetic Georgian corpora that only use syllables present in AudioDB."""
+import random
+
+from db import available_syllables
+from Functions import preprocess_and_syllabify
+
+DEFAULT_SEED = 1234
+VOCABULARY_SIZE = 400
+MAX_WORD_SYLLABLES = 3
+MAX_ATTEMPTS = 200_000
+
+
+def is_covered(word, inventory):
+    """True if the full frontend turns `word` into inventory syllables only"""
+    sylls = [s for s in preprocess_and_syllabify(word) if s not in ("<s>", "<eos>")]
+    return bool(sylls) and all(s in inventory for s in sylls)
+
+
+def covered_vocabulary(inventory=None, size=VOCABULARY_SIZE, seed=DEFAULT_SEED):
+    """Words built from inventory syllables that also syllabify back into inventory syllables"""
+    inventory = inventory if inventory is not None else available_syllables()
+    units = sorted(inventory)
+    rng = random.Random(seed)
+    words = []
+    seen = set()
+    for _ in range(MAX_ATTEMPTS):
+        if len(words) >= size:
+            break
+        word = "".join(rng.choice(units) for _ in range(rng.randint(1, MAX_WORD_SYLLABLES)))
+        if word in seen:
+            continue
+        seen.add(word)
+        if is_covered(word, inventory) and is_covered(word + ".", inventory):
+            words.append(word)
+    return words
+
+
+def sentence(rng, vocabulary, min_words=3, max_words=12):
+    words = [rng.choice(vocabulary) for _ in range(rng.randint(min_words, max_words))]
+    return " ".join(words) + "."
+
+
+def prompts(count, seed=DEFAULT_SEED, vocabulary=None, min_words=2, max_words=6):
+    """Short IVR-style prompts"""
+    vocabulary = vocabulary or covered_vocabulary(seed=seed)
+    rng = random.Random(seed)
+    return [sentence(rng, vocabulary, min_words, max_words) for _ in range(count)]
+
+
+def paragraphs(count, seed=DEFAULT_SEED, vocabulary=None, sentences=(3, 8)):
+    vocabulary = vocabulary or covered_vocabulary(seed=seed)
+    rng = random.Random(seed)
+    return [" ".join(sentence(rng, vocabulary) for _ in range(rng.randint(*sentences)))
+            for _ in range(count)]
+
+
+def corpus(size_bytes, seed=DEFAULT_SEED, vocabulary=None):
+    """Text of roughly `size_bytes` UTF-8 bytes, in paragraphs separated by newlines"""
+    vocabulary = vocabulary or covered_vocabulary(seed=seed)
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size_bytes:
+        para = " ".join(sentence(rng, vocabulary) for _ in range(rng.randint(3, 8)))
+        parts.append(para)
+        total += len(para.encode("utf-8")) + 1
+    return "\n".join(parts)
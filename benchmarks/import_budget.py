@@ -0,0 +1,71 @@
+"""Import-time budget check for the headless modules.
+
+Each module is imported in a fresh interpreter under `python -X importtime`; the
+check fails (exit status 1) when the best of several runs exceeds the module's
+budget or when a headless module pulls in GUI or optional audio/document packages.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# Cumulative import time budgets in milliseconds
+BUDGETS_MS = {
+    "Functions": 60,
+    "readers": 120,
+    "engine": 250,
+    "server": 300,
+}
+# Modules that must stay out of a headless cold start
+FORBIDDEN = ("PyQt6", "pydub", "parselmouth", "PyPDF2", "docx")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_time_ms(module):
+    """Cumulative import time of `module` in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    for line in reversed(result.stderr.splitlines()):
+        if line.startswith("import time:") and line.rsplit("|", 1)[-1].strip() == module:
+            return int(line.split("|")[1]) / 1000
+    raise RuntimeError(f"no importtime record for {module}")
+
+
+def loaded_forbidden(module):
+    code = (f"import sys, json, {module}; "
+            f"print(json.dumps([m for m in {FORBIDDEN!r} if m in sys.modules]))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def check(runs=3, scale=1.0):
+    report = {}
+    for module, budget in BUDGETS_MS.items():
+        best = min(import_time_ms(module) for _ in range(runs))
+        forbidden = loaded_forbidden(module)
+        report[module] = {
+            "import_ms": round(best, 1),
+            "budget_ms": budget * scale,
+            "forbidden_imports": forbidden,
+            "ok": best <= budget * scale and not forbidden,
+        }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiply every budget, e.g. for slow CI machines")
+    args = parser.parse_args(argv)
+    report = check(args.runs, args.scale)
+    print(json.dumps(report, indent=2))
+    return 0 if all(entry["ok"] for entry in report.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""Load generator for the synthesis engine and the HTTP service.
+
+Keeps --concurrency requests in flight for --duration seconds, drawing each
+text from a mix of short prompts and paragraphs built from the AudioDB-covered
+vocabulary, and prints a JSON report: throughput, latency and
+time-to-first-chunk percentiles (p50/p95/p99) and error counts by kind.
+
+    python -m benchmarks.loadgen --target inprocess --concurrency 16
+    python -m benchmarks.loadgen --target http --url http://127.0.0.1:8765
+    python -m benchmarks.loadgen --target http --serve    # starts a local server first
+
+In-process requests go through async_api.stream_async, so the first chunk is
+the first rendered sentence, as with the server's chunked responses. Repeated
+texts that are in flight together are coalesced by the server, so raise
+--pool for a mix with fewer repeats.
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.corpus import prompts, paragraphs, covered_vocabulary, DEFAULT_SEED
+from async_api import stream_async
+from engine import SynthesisEngine
+
+# === Constants ===
+DEFAULT_URL = "http://127.0.0.1:8765"
+DEFAULT_POOL = 200
+PERCENTILES = (50, 95, 99)
+HEADER_LIMIT = 16 << 10
+
+
+class RequestFailed(Exception):
+    pass
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))] if ordered else None
+
+
+def summarize(values):
+    return {f"p{q}_ms": None if percentile(values, q) is None else round(percentile(values, q) * 1000, 1)
+            for q in PERCENTILES}
+
+
+def request_mix(pool, short_fraction, seed=DEFAULT_SEED):
+    """Endless (kind, text) draws: short prompts with probability `short_fraction`, paragraphs otherwise"""
+    vocabulary = covered_vocabulary(seed=seed)
+    texts = {
+        "short": prompts(pool, seed=seed, vocabulary=vocabulary),
+        "paragraph": paragraphs(max(1, pool // 4), seed=seed, vocabulary=vocabulary),
+    }
+    rng = random.Random(seed)
+    while True:
+        kind = "short" if rng.random() < short_fraction else "paragraph"
+        yield kind, rng.choice(texts[kind])
+
+
+class InProcessTarget:
+    """Streams through the asyncio API on a private engine"""
+
+    def __init__(self, workers):
+        self.engine = SynthesisEngine()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    async def request(self, text, first_chunk):
+        async for _ in stream_async(text, engine=self.engine, executor=self.executor):
+            first_chunk()
+
+    async def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class HTTPTarget:
+    """POST /synthesize over a fresh connection per request, reading the chunked response"""
+
+    def __init__(self, url, fmt):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.fmt = fmt
+
+    async def request(self, text, first_chunk):
+        reader, writer = await asyncio.open_connection(self.host, self.port, limit=HEADER_LIMIT)
+        try:
+            body = json.dumps({"text": text, "format": self.fmt}, ensure_ascii=False).encode("utf-8")
+            writer.write((f"POST /synthesize HTTP/1.1\r\nHost: {self.host}\r\n"
+                          f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode("latin-1")
+                         + body)
+            await writer.drain()
+            head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+            status = int(head.split(" ", 2)[1])
+            if status != 200:
+                raise RequestFailed(f"http_{status}")
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                data = await reader.readexactly(size + 2)
+                if size == 0:
+                    return
+                # A WAV stream's header goes out as its own chunk before any audio
+                if not (self.fmt == "wav" and data.startswith(b"RIFF")):
+                    first_chunk()
+        finally:
+            writer.close()
+
+    async def close(self):
+        pass
+
+
+async def drive(target, mix, concurrency, duration):
+    results = []
+    errors = {}
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration
+
+    async def worker():
+        while loop.time() < deadline:
+            kind, text = next(mix)
+            start = time.perf_counter()
+            first = []
+
+            def first_chunk():
+                if not first:
+                    first.append(time.perf_counter() - start)
+
+            try:
+                await target.request(text, first_chunk)
+            except RequestFailed as e:
+                errors[str(e)] = errors.get(str(e), 0) + 1
+                continue
+            except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                continue
+            results.append((kind, time.perf_counter() - start, first[0] if first else None))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results, errors, time.perf_counter() - start
+
+
+async def run_load(target, mix, concurrency, duration, serve=False):
+    server = None
+    if serve:
+        from server import SynthesisServer
+
+        server = await SynthesisServer(port=0).start()
+        target.port = server.port
+    try:
+        results, errors, elapsed = await drive(target, mix, concurrency, duration)
+    finally:
+        await target.close()
+        if server is not None:
+            await server.close()
+    latencies = [latency for _, latency, _ in results]
+    first_chunks = [first for _, _, first in results if first is not None]
+    return {
+        "requests": len(results),
+        "errors": errors,
+        "error_count": sum(errors.values()),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(results) / elapsed, 1),
+        "by_kind": {kind: sum(1 for k, _, _ in results if k == kind) for kind in ("short", "paragraph")},
+        "latency": summarize(latencies),
+        "time_to_first_chunk": summarize(first_chunks),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=("inprocess", "http"), default="inprocess")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--serve", action="store_true", help="start a local server on a free port (http target)")
+    parser.add_argument("--format", default="pcm", help="response format for the http target")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10, help="seconds")
+    parser.add_argument("--short-fraction", type=float, default=0.8, help="share of short prompts in the mix")
+    parser.add_argument("--pool", type=int, default=DEFAULT_POOL, help="distinct short prompts to draw from")
+    parser.add_argument("--workers", type=int, default=4, help="executor threads for the inprocess target")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args(argv)
+
+    mix = request_mix(args.pool, args.short_fraction, args.seed)
+    if args.target == "inprocess":
+        target = InProcessTarget(args.workers)
+    else:
+        target = HTTPTarget(args.url, args.format)
+    report = {"target": args.target, "concurrency": args.concurrency, "duration_s": args.duration,
+              "short_fraction": args.short_fraction}
+    report.update(asyncio.run(run_load(target, mix, args.concurrency, args.duration, args.serve)))
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""Golden-output and real-time-factor regression gate.
+
+For a fixed reference corpus this checks that the normalized text, the syllable
+stream and the deterministic (seeded) audio are unchanged, by comparing against
+golden files in benchmarks/golden/. It also measures frontend throughput,
+render real-time factor and batch throughput, and fails when any of them is
+worse than the recorded baseline by more than --tolerance. The speed baseline
+is machine specific: re-record it with --update on the machine that runs the gate.
+
+    python -m benchmarks.regression              # check, exit 1 on any regression
+    python -m benchmarks.regression --update     # re-record goldens and the speed baseline
+    python -m benchmarks.regression --skip-speed # output checks only
+"""
+import io
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import platform
+from contextlib import redirect_stdout
+
+from benchmarks.corpus import corpus, prompts, paragraphs, covered_vocabulary, DEFAULT_SEED
+from engine import SynthesisEngine
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+OUTPUTS_FILE = os.path.join(GOLDEN_DIR, "outputs.json")
+SPEED_FILE = os.path.join(GOLDEN_DIR, "speed.json")
+AUDIO_SEED = 7
+SPEED_CORPUS_BYTES = 100 << 10
+SPEED_PROMPTS = 500
+SPEED_REPEATS = 5
+DEFAULT_TOLERANCE = 0.3
+
+# ნორმალიზაციის შემთხვევები: რიცხვები, შემოკლებები, აკრონიმები, სიმბოლოები
+NORMALIZER_CASES = [
+    ("numbers", "2024 წელს 15 კაცი მოვიდა, 3 ქალი და 1000000 ლარი."),
+    ("abbreviations", "მაგ. ეს ე.ი. ასეა, ა.შ. და სხვ. მისთ. რაღაცები."),
+    ("acronyms", "თსუ და შპს სსრკ-ში. თსუ კარგია."),
+    ("symbols", "50% + 10 = 60 ₾ & 5 $ „ციტატა“ (ფრჩხილი) [კი] @ # / |"),
+    ("latin", "Hello world, ABC 12 x-y."),
+    ("punctuation", "რა? არა! კი; ალბათ: დიახ... ასე."),
+    ("empty", "   "),
+]
+
+
+def reference_cases(seed=DEFAULT_SEED):
+    """(name, text) pairs of the reference corpus"""
+    vocabulary = covered_vocabulary(seed=seed)
+    cases = list(NORMALIZER_CASES)
+    cases += [(f"prompt_{i}", text) for i, text in enumerate(prompts(10, seed=seed, vocabulary=vocabulary))]
+    cases += [(f"paragraph_{i}", text) for i, text in enumerate(paragraphs(3, seed=seed, vocabulary=vocabulary))]
+    return cases
+
+
+def audio_digest(samples):
+    return hashlib.sha256(samples.tobytes()).hexdigest()
+
+
+def record_outputs(engine, cases, seed=AUDIO_SEED):
+    """Normalized text, syllables and seeded-audio hash for every case"""
+    from Functions import normalize_text, syllabify_normalized
+
+    records = []
+    for name, text in cases:
+        normalized = normalize_text(text)
+        syllables = syllabify_normalized(normalized)
+        # Missing units are reported on stdout; they are part of the golden output anyway
+        with redirect_stdout(io.StringIO()):
+            samples = engine.render(syllables, seed)
+        records.append({
+            "name": name,
+            "text": text,
+            "normalized": normalized,
+            "syllables": syllables,
+            "audio_samples": len(samples),
+            "audio_sha256": audio_digest(samples),
+        })
+    return records
+
+
+def first_difference(before, after):
+    for index, (a, b) in enumerate(zip(before, after)):
+        if a != b:
+            return index
+    return min(len(before), len(after))
+
+
+def compare_outputs(current, golden):
+    """Describe every case whose output differs from the golden record"""
+    failures = []
+    expected = {record["name"]: record for record in golden}
+    for record in current:
+        before = expected.pop(record["name"], None)
+        if before is None:
+            failures.append(f"{record['name']}: no golden record (run with --update)")
+            continue
+        if before["text"] != record["text"]:
+            failures.append(f"{record['name']}: reference text changed (run with --update)")
+            continue
+        for field in ("normalized", "syllables"):
+            if before[field] != record[field]:
+                index = first_difference(before[field], record[field])
+                failures.append(f"{record['name']}: {field} differs at {index}: "
+                                f"{before[field][index:index + 8]!r} -> {record[field][index:index + 8]!r}")
+        if (before["audio_samples"], before["audio_sha256"]) != (record["audio_samples"], record["audio_sha256"]):
+            failures.append(f"{record['name']}: audio differs "
+                            f"({before['audio_samples']} -> {record['audio_samples']} samples)")
+    failures += [f"{name}: golden record has no reference case" for name in expected]
+    return failures
+
+
+def best_of(func, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def measure_speed(engine, seed=DEFAULT_SEED, repeats=SPEED_REPEATS):
+    """Best-of-N throughput figures; real_time_factor is reported only, the
+    gate uses its inverse render_realtime_x so that higher is always better"""
+    vocabulary = covered_vocabulary(seed=seed)
+    text = corpus(SPEED_CORPUS_BYTES, seed=seed, vocabulary=vocabulary)
+    batch = prompts(SPEED_PROMPTS, seed=seed, vocabulary=vocabulary)
+
+    frontend_s, syllables = best_of(lambda: engine.frontend(text), repeats)
+    engine.prepare(syllables)
+    render_s, samples = best_of(lambda: engine.render(syllables, AUDIO_SEED), repeats)
+    batch_s, _ = best_of(lambda: engine.synthesize_many(batch, seed=AUDIO_SEED), repeats)
+    audio_seconds = len(samples) / engine.sample_rate
+    return {
+        "frontend_chars_per_s": len(text) / frontend_s,
+        "render_realtime_x": audio_seconds / render_s,
+        "batch_prompts_per_s": len(batch) / batch_s,
+        "real_time_factor": render_s / audio_seconds,
+    }
+
+
+def compare_speed(current, baseline, tolerance):
+    """Metrics that fell more than `tolerance` below the baseline"""
+    failures = []
+    for metric, value in current.items():
+        before = baseline.get(metric)
+        if not before or metric == "real_time_factor":
+            continue
+        ratio = value / before
+        if ratio < 1 - tolerance:
+            failures.append(f"{metric}: {value:.1f} vs baseline {before:.1f} ({ratio:.2f}x)")
+    return failures
+
+
+def load_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1, ensure_ascii=False)
+        f.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--update", action="store_true", help="re-record golden outputs and the speed baseline")
+    parser.add_argument("--skip-speed", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed fractional slowdown against the baseline")
+    parser.add_argument("--repeats", type=int, default=SPEED_REPEATS)
+    args = parser.parse_args(argv)
+
+    engine = SynthesisEngine()
+    outputs = record_outputs(engine, reference_cases())
+    report = {"cases": len(outputs), "failures": []}
+    if args.update:
+        save_json(OUTPUTS_FILE, outputs)
+    else:
+        golden = load_json(OUTPUTS_FILE)
+        if golden is None:
+            report["failures"].append(f"missing {OUTPUTS_FILE} (run with --update)")
+        else:
+            report["failures"] += compare_outputs(outputs, golden)
+
+    if not args.skip_speed:
+        speed = measure_speed(engine, repeats=args.repeats)
+        report["speed"] = speed
+        if args.update:
+            save_json(SPEED_FILE, {
+                "meta": {"python": platform.python_version(), "platform": platform.platform()},
+                "metrics": speed,
+            })
+        else:
+            baseline = load_json(SPEED_FILE)
+            if baseline is not None:
+                report["failures"] += compare_speed(speed, baseline["metrics"], args.tolerance)
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 1 if report["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
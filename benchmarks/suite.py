@@ -0,0 +1,316 @@
+"""Benchmark suite for every pipeline stage.
+
+Runs the text frontend, unit lookup/preparation, concatenation, noise overlay and
+WAV export over fixed synthetic corpora and prints JSON with ops/s, p50/p95
+latency and real-time factor per stage. Audio stages are skipped for corpora
+larger than --max-audio-size (10 MB of text is days of audio). Each stage
+also records process_peak_rss_mb, the process's high-water mark when the
+stage finished; it never goes down, so it is not that stage's own memory
+use (the tracemalloc peaks below are).
+
+The parallel frontend (engine.frontend_parallel) is timed against the
+sequential chunked frontend for each --frontend-workers count on corpora of
+100KB and up, and its speedup is reported next to the machine's core count.
+
+The bounded-memory render (synthesize_to_sink) is also run under tracemalloc
+for each audio corpus; its per-stage peaks are reported and the run fails if
+the peak exceeds --memory-limit.
+
+    python -m benchmarks.suite --sizes 1KB 100KB 10MB --output run.json
+    python -m benchmarks.suite --compare run.json --tolerance 0.2
+    python -m benchmarks.suite --memory-limit 32
+    python -m benchmarks.suite --sizes 10MB --frontend-workers 1 2 4 8
+"""
+import io
+import os
+import re
+import sys
+import json
+import time
+import platform
+import argparse
+
+from benchmarks.corpus import corpus, covered_vocabulary, DEFAULT_SEED
+from db import get_syllable_audio_path
+from engine import (
+    SynthesisEngine, Assembler, PAUSE_TOKENS, DEFAULT_MEMORY_LIMIT, MemoryLimitExceeded, add_noise, samples_to_segment,
+)
+from tracing import trace
+from Functions import (
+    expand_symbols, expand_abbreviations, expand_acronyms, expand_numbers, remove_symbols_and_tags,
+    normalize_text, syllabify_georgian, preprocess_and_syllabify, prepare_segment,
+)
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+SIZES = {"1KB": 1 << 10, "100KB": 100 << 10, "10MB": 10 << 20}
+DEFAULT_SIZES = ["1KB", "100KB"]
+MAX_AUDIO_SIZE = "100KB"
+MAX_ITEMS = 2000
+DEFAULT_FRONTEND_WORKERS = [1, 2, 4]
+MIN_PARALLEL_SIZE = "100KB"
+HYPHEN_RE = re.compile(r'([a-zA-Z]+)-([a-zA-Z]+)')
+
+
+def process_peak_rss_mb():
+    """Peak RSS of the whole process so far, not of the latest stage"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def summarize(stage, corpus_name, latencies, audio_seconds=None):
+    total = sum(latencies)
+    return {
+        "stage": stage,
+        "corpus": corpus_name,
+        "ops": len(latencies),
+        "ops_per_s": len(latencies) / total if total else None,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "real_time_factor": total / len(latencies) / audio_seconds if audio_seconds else None,
+        "process_peak_rss_mb": process_peak_rss_mb(),
+    }
+
+
+def repeat(func, arg, repeats):
+    latencies = []
+    result = None
+    for _ in range(repeats):
+        elapsed, result = timed(func, arg)
+        latencies.append(elapsed)
+    return latencies, result
+
+
+def bench_frontend(name, text, repeats):
+    results = []
+    # normalize_text as a whole, then each sub-stage fed with its real input
+    latencies, _ = repeat(normalize_text, text, repeats)
+    results.append(summarize("normalize_text", name, latencies))
+    substages = [
+        ("expand_symbols", expand_symbols),
+        ("expand_abbreviations", expand_abbreviations),
+        ("expand_acronyms", expand_acronyms),
+        ("join_hyphenated_latin", lambda t: HYPHEN_RE.sub(r'\1\2', t)),
+        ("expand_numbers", expand_numbers),
+        ("remove_symbols_and_tags", remove_symbols_and_tags),
+    ]
+    stage_input = text
+    for stage, func in substages:
+        latencies, stage_output = repeat(func, stage_input, repeats)
+        results.append(summarize(f"normalize_text.{stage}", name, latencies))
+        stage_input = stage_output
+
+    words = stage_input.split()[:MAX_ITEMS]
+    cleaned = [re.sub(r'[.,!?;:"„"–]', '', w) for w in words]
+    latencies = [timed(syllabify_georgian, w)[0] for w in cleaned if w]
+    results.append(summarize("syllabify_georgian", name, latencies))
+
+    latencies, syllables = repeat(preprocess_and_syllabify, text, repeats)
+    results.append(summarize("preprocess_and_syllabify", name, latencies))
+    return results, syllables
+
+
+def bench_units(engine, syllables):
+    results = []
+    units = [s for s in syllables if s not in PAUSE_TOKENS][:MAX_ITEMS]
+    latencies = [timed(get_syllable_audio_path, s)[0] for s in units]
+    results.append(summarize("unit_lookup.db", "units", latencies))
+    latencies = [timed(engine.inventory.get, s)[0] for s in units]
+    results.append(summarize("unit_lookup.inventory", "units", latencies))
+    latencies = [timed(prepare_segment, path)[0] for path in sorted(engine.inventory.values())]
+    results.append(summarize("prepare_segment", "units", latencies))
+    return results
+
+
+def assemble(engine, syllables):
+    out = Assembler(engine.sample_rate)
+    for syl in syllables:
+        if syl in PAUSE_TOKENS:
+            out.pause(PAUSE_TOKENS[syl])
+        else:
+            samples = engine.unit(syl)
+            if samples is not None:
+                out.add(samples)
+    return out.samples()
+
+
+def export_wav(samples, sample_rate):
+    buffer = io.BytesIO()
+    samples_to_segment(samples, sample_rate).export(buffer, format="wav")
+    return buffer
+
+
+def bench_audio(engine, name, syllables, repeats):
+    engine.prepare(syllables)
+    latencies, samples = repeat(lambda s: assemble(engine, s), syllables, repeats)
+    audio_seconds = len(samples) / engine.sample_rate
+    results = [summarize("concatenate", name, latencies, audio_seconds)]
+    latencies, noisy = repeat(add_noise, samples, repeats)
+    results.append(summarize("noise_overlay", name, latencies, audio_seconds))
+    latencies, _ = repeat(lambda s: export_wav(s, engine.sample_rate), noisy, repeats)
+    results.append(summarize("wav_export", name, latencies, audio_seconds))
+    latencies, _ = repeat(engine.render, syllables, repeats)
+    results.append(summarize("render_end_to_end", name, latencies, audio_seconds))
+    return results
+
+
+def bench_parallel_frontend(engine, name, text, worker_counts):
+    """Speedup of the process-pool frontend over the sequential chunked frontend"""
+    sequential, expected = timed(lambda t: list(engine.frontend_chunks(t)), text)
+    results = []
+    for workers in worker_counts:
+        elapsed, syllables = timed(lambda t: list(engine.frontend_parallel(t, workers)), text)
+        results.append({
+            "stage": "parallel_frontend",
+            "corpus": name,
+            "workers": workers,
+            "cpu_count": os.cpu_count(),
+            "seconds": elapsed,
+            "sequential_seconds": sequential,
+            "speedup": sequential / elapsed,
+            "chars_per_s": len(text) / elapsed,
+            "identical": syllables == expected,
+        })
+    return results
+
+
+class NullSink:
+    def __init__(self):
+        self.samples = 0
+
+    def write(self, samples):
+        self.samples += len(samples)
+
+
+def bench_memory(engine, name, text, memory_limit):
+    """Bounded-memory render of the whole corpus with per-stage tracemalloc peaks"""
+    sink = NullSink()
+    with trace("bounded_render", sinks=[], memory=True) as bounded:
+        try:
+            engine.synthesize_to_sink(text, sink, memory_limit=memory_limit)
+        except MemoryLimitExceeded:
+            pass
+    written = sink.samples
+    stages = bounded.breakdown()
+    peak_mb = bounded.peaks["total"] / (1 << 20)
+    return {
+        "stage": "bounded_render",
+        "corpus": name,
+        "audio_seconds": written / engine.sample_rate,
+        "real_time_factor": bounded.duration / (written / engine.sample_rate) if written else None,
+        "memory_limit_mb": round(memory_limit / (1 << 20), 2),
+        "peak_mb": round(peak_mb, 2),
+        "stage_peak_mb": {stage: round(entry["peak_kb"] / 1024, 2) for stage, entry in stages.items()},
+        "within_limit": peak_mb * (1 << 20) <= memory_limit,
+    }
+
+
+def run(sizes, repeats=5, seed=DEFAULT_SEED, max_audio_size=MAX_AUDIO_SIZE, memory_limit=DEFAULT_MEMORY_LIMIT,
+        frontend_workers=DEFAULT_FRONTEND_WORKERS):
+    vocabulary = covered_vocabulary(seed=seed)
+    engine = SynthesisEngine()
+    results = []
+    unit_syllables = None
+    for name in sizes:
+        text = corpus(SIZES[name], seed=seed, vocabulary=vocabulary)
+        # Large corpora get fewer repetitions so the suite stays practical
+        runs = repeats if SIZES[name] <= SIZES["100KB"] else 1
+        frontend_results, syllables = bench_frontend(name, text, runs)
+        results.extend(frontend_results)
+        if unit_syllables is None:
+            unit_syllables = syllables
+        if SIZES[name] >= SIZES[MIN_PARALLEL_SIZE] and frontend_workers:
+            results.extend(bench_parallel_frontend(engine, name, text, frontend_workers))
+        if SIZES[name] <= SIZES[max_audio_size]:
+            results.extend(bench_audio(engine, name, syllables, runs))
+            results.append(bench_memory(engine, name, text, memory_limit))
+    if unit_syllables is not None:
+        results.extend(bench_units(engine, unit_syllables))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeats": repeats,
+            "memory_limit_mb": round(memory_limit / (1 << 20), 2),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Return stages whose throughput dropped by more than `tolerance`"""
+    previous = {(r["stage"], r["corpus"]): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        before = previous.get((result["stage"], result["corpus"]))
+        if not before or not before.get("ops_per_s") or not result.get("ops_per_s"):
+            continue
+        ratio = result["ops_per_s"] / before["ops_per_s"]
+        result["vs_baseline"] = round(ratio, 3)
+        if ratio < 1 - tolerance:
+            regressions.append(f"{result['stage']} [{result['corpus']}]: {ratio:.2f}x of baseline")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=DEFAULT_SIZES)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--max-audio-size", choices=list(SIZES), default=MAX_AUDIO_SIZE)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--memory-limit", type=float, default=DEFAULT_MEMORY_LIMIT / (1 << 20),
+                        help="peak memory ceiling in MB for the bounded-memory render")
+    parser.add_argument("--frontend-workers", type=int, nargs="*", default=DEFAULT_FRONTEND_WORKERS,
+                        help="process counts for the parallel frontend (none to skip it)")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.repeats, args.seed, args.max_audio_size, int(args.memory_limit * (1 << 20)),
+                 args.frontend_workers)
+    regressions = [
+        f"bounded_render [{r['corpus']}]: peak {r['peak_mb']} MB over {r['memory_limit_mb']} MB"
+        for r in report["results"] if r.get("within_limit") is False
+    ]
+    regressions += [
+        f"parallel_frontend [{r['corpus']}, {r['workers']} workers]: output differs from the sequential frontend"
+        for r in report["results"] if r.get("identical") is False
+    ]
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions += compare(report, json.load(f), args.tolerance)
+    if regressions:
+        report["regressions"] = regressions
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
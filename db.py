@@ -28,3 +28,9 @@ def get_syllable_audio_path(syllable, db_path=None):
     if os.path.exists(audio_file):
         return audio_file
     return None
+
+def available_syllables(audio_dir=None):
+    """Return the set of syllables that have a recording in the audio directory"""
+    if audio_dir is None:
+        audio_dir = resource_path("AudioDB")
+    return frozenset(file[:-4] for file in os.listdir(audio_dir) if file.endswith(".wav"))
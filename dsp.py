@@ -0,0 +1,171 @@
+"""NumPy signal processing for synthesis output.
+
+Polyphase resampling to an output rate, WSOLA time-stretching for speaking
+rate control, and G.711 µ-law/A-law encoding for telephony.
+"""
+from math import gcd
+from functools import lru_cache
+
+import numpy as np
+
+# === Constants ===
+# Filter half-length in zero crossings of the anti-aliasing filter, and Kaiser beta
+RESAMPLE_ZERO_CROSSINGS = 10
+RESAMPLE_KAISER_BETA = 5.0
+RESAMPLE_BLOCK = 8192
+# WSOLA frame length and how far a frame may move to line up with the previous one
+WSOLA_FRAME_MS = 20
+WSOLA_TOLERANCE_MS = 4
+MULAW_BIAS = 0x84
+MULAW_CLIP = 8159
+ENCODINGS = ("pcm", "mulaw", "alaw")
+# Resamplers (filter tables) kept for the most recently used rate pairs
+MAX_RESAMPLERS = 16
+
+
+class PolyphaseResampler:
+    """Rational-ratio resampler: upsample by `up`, low-pass, downsample by `down`,
+    computing only the output samples that are kept"""
+
+    def __init__(self, from_rate, to_rate):
+        divisor = gcd(from_rate, to_rate)
+        self.up = to_rate // divisor
+        self.down = from_rate // divisor
+        factor = max(self.up, self.down)
+        half = RESAMPLE_ZERO_CROSSINGS * factor
+        n = np.arange(-half, half + 1)
+        taps = np.sinc(n / factor) * np.kaiser(2 * half + 1, RESAMPLE_KAISER_BETA) * (self.up / factor)
+        self.half = half
+        # Phase p of the filter holds taps p, p + up, p + 2*up, ...
+        per_phase = -(-len(taps) // self.up)
+        padded = np.zeros(per_phase * self.up)
+        padded[:len(taps)] = taps
+        self.phases = padded.reshape(per_phase, self.up).T.astype(np.float32)
+        self.per_phase = per_phase
+
+    def output_length(self, n):
+        return -(-n * self.up // self.down)
+
+    def __call__(self, samples):
+        """Resample int16 samples; returns int16"""
+        if self.up == self.down:
+            return samples
+        n_out = self.output_length(len(samples))
+        padded = np.concatenate([
+            np.zeros(self.per_phase, dtype=np.float32),
+            np.asarray(samples, dtype=np.float32),
+            np.zeros(self.per_phase + 1, dtype=np.float32),
+        ])
+        out = np.empty(n_out, dtype=np.int16)
+        lags = np.arange(self.per_phase)
+        for start in range(0, n_out, RESAMPLE_BLOCK):
+            position = np.arange(start, min(start + RESAMPLE_BLOCK, n_out), dtype=np.int64) * self.down + self.half
+            phase = position % self.up
+            base = position // self.up + self.per_phase
+            window = padded[base[:, None] - lags[None, :]]
+            values = np.einsum("ij,ij->i", window, self.phases[phase])
+            np.clip(np.rint(values), -32768, 32767, out=values)
+            out[start:start + len(values)] = values
+        return out
+
+
+@lru_cache(maxsize=MAX_RESAMPLERS)
+def resampler(from_rate, to_rate):
+    return PolyphaseResampler(from_rate, to_rate)
+
+
+def resample(samples, from_rate, to_rate):
+    if from_rate == to_rate:
+        return samples
+    return resampler(from_rate, to_rate)(samples)
+
+
+def time_stretch(samples, speed, sample_rate):
+    """WSOLA time-stretch of int16 samples: `speed` > 1 shortens, < 1 lengthens, pitch is kept.
+
+    Frames are read every frame/2 * speed input samples and overlap-added every
+    frame/2 output samples; each frame is shifted within the tolerance to the
+    position that best continues the previously copied frame.
+    """
+    if speed == 1 or len(samples) == 0:
+        return samples
+    frame = max(2, int(sample_rate * WSOLA_FRAME_MS / 1000)) & ~1
+    hop = frame // 2
+    tolerance = int(sample_rate * WSOLA_TOLERANCE_MS / 1000)
+    n_out = max(1, int(round(len(samples) / speed)))
+    n_frames = -(-n_out // hop) + 1
+    x = np.concatenate([
+        np.zeros(tolerance, dtype=np.float32),
+        np.asarray(samples, dtype=np.float32),
+        np.zeros(int(n_frames * hop * speed) + frame + 2 * tolerance, dtype=np.float32),
+    ])
+    window = np.hanning(frame + 2)[1:-1].astype(np.float32)
+    out = np.zeros(n_frames * hop + frame, dtype=np.float32)
+    norm = np.zeros_like(out)
+    offsets = np.arange(-tolerance, tolerance + 1)
+    previous = None
+    for k in range(n_frames):
+        nominal = int(k * hop * speed) + tolerance
+        if previous is None:
+            start = nominal
+        else:
+            # Pick the shift whose frame best matches the natural continuation of the last one
+            target = x[previous + hop:previous + hop + frame]
+            candidates = np.lib.stride_tricks.sliding_window_view(
+                x[nominal - tolerance:nominal + tolerance + frame], frame)
+            start = nominal + offsets[np.argmax(candidates @ target)]
+        out[k * hop:k * hop + frame] += x[start:start + frame] * window
+        norm[k * hop:k * hop + frame] += window
+        previous = start
+    out = out[:n_out] / np.maximum(norm[:n_out], 1e-3)
+    np.clip(np.rint(out), -32768, 32767, out=out)
+    return out.astype(np.int16)
+
+
+def encode_mulaw(samples):
+    """G.711 µ-law: int16 samples to one byte each"""
+    x = np.asarray(samples, dtype=np.int32) >> 2
+    negative = x < 0
+    magnitude = np.minimum(np.where(negative, -x, x), MULAW_CLIP) + (MULAW_BIAS >> 2)
+    exponent = np.floor(np.log2(magnitude)).astype(np.int32) - 5
+    mantissa = (magnitude >> (exponent + 1)) & 0x0F
+    # Full-scale samples land past the last segment and take the largest code
+    code = np.where(exponent > 7, 0x7F, exponent << 4 | mantissa)
+    return (code ^ np.where(negative, 0x7F, 0xFF)).astype(np.uint8)
+
+
+def decode_mulaw(codes):
+    codes = ~np.asarray(codes, dtype=np.int32) & 0xFF
+    exponent = (codes >> 4) & 0x07
+    magnitude = (((codes & 0x0F) << 3) + MULAW_BIAS) << exponent
+    return np.where(codes & 0x80, MULAW_BIAS - magnitude, magnitude - MULAW_BIAS).astype(np.int16)
+
+
+def encode_alaw(samples):
+    """G.711 A-law: int16 samples to one byte each"""
+    x = np.asarray(samples, dtype=np.int32) >> 3
+    sign = np.where(x >= 0, 0x80, 0)
+    magnitude = np.where(x >= 0, x, -x - 1)
+    magnitude = np.minimum(magnitude, 0x0FFF)
+    exponent = np.maximum(np.floor(np.log2(np.maximum(magnitude, 1))).astype(np.int32) - 4, 0)
+    mantissa = np.where(exponent == 0, magnitude >> 1, magnitude >> exponent) & 0x0F
+    return ((sign | (exponent << 4) | mantissa) ^ 0x55).astype(np.uint8)
+
+
+def decode_alaw(codes):
+    codes = np.asarray(codes, dtype=np.int32) ^ 0x55
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = np.where(exponent == 0, (mantissa << 4) + 8, ((mantissa << 4) + 0x108) << np.maximum(exponent - 1, 0))
+    return np.where(codes & 0x80, magnitude, -magnitude).astype(np.int16)
+
+
+def encode(samples, encoding="pcm"):
+    """Bytes of int16 samples as 16-bit little-endian PCM or G.711 µ-law/A-law"""
+    if encoding == "pcm":
+        return np.asarray(samples, dtype="<i2").tobytes()
+    if encoding == "mulaw":
+        return encode_mulaw(samples).tobytes()
+    if encoding == "alaw":
+        return encode_alaw(samples).tobytes()
+    raise ValueError(f"Unsupported encoding: {encoding}")
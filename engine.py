@@ -0,0 +1,744 @@
+"""Reusable, thread-safe synthesis engine.
+
+A SynthesisEngine loads the unit inventory once and prepares each unit at most
+once; prepared units are kept as read-only NumPy arrays shared by all threads.
+Output is assembled with NumPy crossfades in linear time instead of repeatedly
+copying a growing AudioSegment. synthesize_to_sink renders long inputs in
+bounded memory, writing finished blocks straight to a sink.
+
+Every synthesis method takes an optional output `rate` and speaking `speed`;
+units are resampled and time-stretched once per (rate, speed) and cached, so
+lower rates and faster speech also assemble fewer samples. Rates come from
+OUTPUT_RATES and speeds are rounded to SPEED_STEP, which keeps that cache small. `pauses` overrides
+the <s>/<eos> pause lengths in milliseconds.
+"""
+import os
+import wave
+import threading
+import tracemalloc
+from itertools import islice
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import numpy as np
+
+from utils import resource_path
+from inventory import (
+    INVENTORY_DB, SAMPLE_RATE, SAMPLE_WIDTH, CHANNELS, FormatMismatch, load_unit, recorded_format, describe_format,
+    wav_format,
+)
+from tracing import span, count, bind
+from dsp import resample, time_stretch
+from alignment import Alignment, UNIT, PAUSE, MISSING
+from Functions import (
+    normalize_text, syllabify_normalized, split_sentences, prepare_segment, unique_syllables, iter_text_chunks,
+    iter_syllable_spans, syllabify_chunks,
+)
+
+# === Constants ===
+# SAMPLE_RATE, SAMPLE_WIDTH and CHANNELS are the canonical unit format from inventory
+CROSSFADE_MS = 15
+WORD_PAUSE_MS = 100
+SENTENCE_PAUSE_MS = 400
+MISSING_PAUSE_MS = 100
+NOISE_GAIN_DB = -35
+PAUSE_TOKENS = {"<s>": WORD_PAUSE_MS, "<eos>": SENTENCE_PAUSE_MS}
+# Every (rate, speed) pair gets its own set of prepared units, so rates come from a
+# fixed list, speeds are rounded to SPEED_STEP and only MAX_RATE_CACHES sets are kept
+OUTPUT_RATES = (8000, 11025, 16000, 22050, 24000, 32000, 44100, 48000)
+SPEED_STEP = 0.05
+MAX_RATE_CACHES = 8
+# Bounded-memory mode: working-set ceiling and the bytes needed per output sample
+# while a block is mixed with noise and encoded (int16 + float32 scratch + copies)
+DEFAULT_MEMORY_LIMIT = 64 << 20
+BYTES_PER_BLOCK_SAMPLE = 16
+BOUNDED_CHUNK_CHARS = 2000
+# Text chunks per task of the parallel frontend, and tasks kept in flight per worker
+FRONTEND_BATCH = 8
+FRONTEND_TASKS_PER_WORKER = 2
+# Rendered sentences kept for reuse within one job, and the longest sentence worth keeping (in tokens)
+SENTENCE_CACHE_BYTES = 16 << 20
+MAX_CACHED_SENTENCE = 200
+
+
+class MemoryLimitExceeded(MemoryError):
+    pass
+
+
+def segment_to_samples(seg):
+    """Mono 16-bit samples of an AudioSegment as a read-only array"""
+    seg = seg.set_channels(CHANNELS).set_sample_width(SAMPLE_WIDTH)
+    samples = np.frombuffer(seg.raw_data, dtype=np.int16)
+    samples.flags.writeable = False
+    return samples
+
+
+def samples_to_segment(samples, sample_rate=SAMPLE_RATE):
+    from pydub import AudioSegment
+
+    return AudioSegment(data=np.asarray(samples, dtype=np.int16).tobytes(), sample_width=SAMPLE_WIDTH,
+                        frame_rate=sample_rate, channels=CHANNELS)
+
+
+class UnitCache:
+    """Thread-safe compute-once cache; concurrent requests for a key wait for one load"""
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.values = {}
+        self.loading = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        while True:
+            with self.lock:
+                if key in self.values:
+                    self.hits += 1
+                    count("unit_cache_hits")
+                    return self.values[key]
+                event = self.loading.get(key)
+                if event is None:
+                    event = self.loading[key] = threading.Event()
+                    self.misses += 1
+                    count("unit_cache_misses")
+                    break
+            # Another thread is loading this key; retry once it finishes
+            event.wait()
+        try:
+            value = self.loader(key)
+            with self.lock:
+                self.values[key] = value
+            return value
+        finally:
+            with self.lock:
+                del self.loading[key]
+            event.set()
+
+    def __contains__(self, key):
+        return key in self.values
+
+    def __len__(self):
+        return len(self.values)
+
+
+class Assembler:
+    """Concatenates units with crossfades and pauses, keeping only a short tail mutable"""
+
+    def __init__(self, sample_rate=SAMPLE_RATE, crossfade_ms=CROSSFADE_MS):
+        self.sample_rate = sample_rate
+        self.crossfade = int(sample_rate * crossfade_ms / 1000)
+        self.pieces = []
+        self.length = 0
+        self.produced = 0
+
+    def __len__(self):
+        return self.length
+
+    def _take_tail(self, n):
+        """Remove and return the last n samples of the output"""
+        parts = []
+        while n > 0:
+            last = self.pieces.pop()
+            if len(last) > n:
+                self.pieces.append(last[:-n])
+                parts.append(last[-n:])
+                n = 0
+            else:
+                parts.append(last)
+                n -= len(last)
+        self.length -= sum(len(p) for p in parts)
+        return np.concatenate(parts[::-1]) if len(parts) > 1 else parts[0]
+
+    def add(self, samples):
+        """Append samples, crossfading their head with the current tail.
+
+        Returns the output position of their first sample.
+        """
+        if len(samples) == 0:
+            return self.produced + self.length
+        n = min(self.crossfade, self.length, len(samples))
+        start = self.produced + self.length - n
+        if n == 0:
+            self.pieces.append(samples)
+            self.length += len(samples)
+            return start
+        tail = self._take_tail(n).astype(np.float32)
+        fade_in = np.linspace(0.0, 1.0, n, dtype=np.float32)
+        mixed = tail * (1.0 - fade_in) + samples[:n] * fade_in
+        self.pieces.append(np.clip(mixed, -32768, 32767).astype(np.int16))
+        self.pieces.append(samples[n:])
+        self.length += len(samples)
+        return start
+
+    def pause(self, ms):
+        """Append silence, but only after some audio has been produced.
+
+        Returns the output position where the silence starts, or None if none was added.
+        """
+        if self.produced + self.length > 0:
+            start = self.produced + self.length
+            n = int(self.sample_rate * ms / 1000)
+            self.pieces.append(np.zeros(n, dtype=np.int16))
+            self.length += n
+            return start
+        return None
+
+    def start_from_silence(self):
+        """Begin with `crossfade` samples of silence, as if after a pause"""
+        self.pieces.append(np.zeros(self.crossfade, dtype=np.int16))
+        self.length += self.crossfade
+
+    def silent_tail(self):
+        """True if the last `crossfade` samples are silence, so whatever is added
+        next does not depend on the output before them"""
+        need = self.crossfade
+        if need == 0 or self.length < need:
+            return False
+        for piece in reversed(self.pieces):
+            part = piece[-need:]
+            if part.any():
+                return False
+            need -= len(part)
+            if need == 0:
+                return True
+        return False
+
+    def splice(self, block):
+        """Replace the silent tail with `block`, which was assembled by an Assembler
+        that started from silence (see start_from_silence). Into an empty
+        Assembler, `block` must come from one that started empty.
+
+        Returns the output position of the first sample of `block`.
+        """
+        overlap = self.crossfade if self.produced + self.length else 0
+        start = self.produced + self.length - overlap
+        if overlap:
+            self._take_tail(overlap)
+        self.pieces.append(block)
+        self.length += len(block)
+        return start
+
+    def drain(self, keep):
+        """Remove and return finished samples, keeping the last `keep` for the next crossfade"""
+        if self.length <= keep:
+            return np.zeros(0, dtype=np.int16)
+        tail = self._take_tail(keep) if keep else None
+        done = self.samples()
+        self.pieces = [tail] if tail is not None else []
+        self.produced += len(done)
+        self.length = keep
+        return done
+
+    def samples(self):
+        if not self.pieces:
+            return np.zeros(0, dtype=np.int16)
+        return np.concatenate(self.pieces)
+
+
+class NoiseSource:
+    """White noise at `gain_db` dBFS drawn from one stream, so noising an output
+    block by block gives the same samples as noising it at once"""
+
+    def __init__(self, gain_db=NOISE_GAIN_DB, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.scale = np.float32(2 * 32767 * 10 ** (gain_db / 20))
+
+    def apply(self, samples):
+        """Overlay noise, clipping like pydub's overlay"""
+        if len(samples) == 0:
+            return samples
+        mixed = self.rng.random(len(samples), dtype=np.float32)
+        mixed -= 0.5
+        mixed *= self.scale
+        mixed += samples
+        np.clip(mixed, -32768, 32767, out=mixed)
+        return mixed.astype(np.int16)
+
+
+def sentence_seed(seed, index):
+    # Each streamed sentence gets its own noise, so the pattern does not repeat every sentence
+    return None if seed is None else seed + index
+
+
+def add_noise(samples, gain_db=NOISE_GAIN_DB, seed=None):
+    return NoiseSource(gain_db, seed).apply(samples)
+
+
+class SentenceCache:
+    """Rendered sentences of one job, reused when a sentence repeats.
+
+    A sentence that follows a pause assembles to the same samples wherever it
+    occurs, so repeated headers, footers and boilerplate are concatenated
+    once and spliced in again afterwards; the output does not change. The
+    least recently used sentences are dropped beyond `max_bytes`.
+    """
+
+    def __init__(self, max_bytes=SENTENCE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.stats = {"sentences": 0, "rendered": 0, "reused": 0, "uncached": 0, "evicted": 0,
+                      "units_reused": 0, "samples_reused": 0, "samples_total": 0}
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        size = entry[0].nbytes
+        if size > self.max_bytes:
+            return
+        self.entries[key] = entry
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (samples, _) = self.entries.popitem(last=False)
+            self.bytes -= samples.nbytes
+            self.stats["evicted"] += 1
+
+    def saved(self):
+        """Share of the output samples that were reused instead of assembled"""
+        total = self.stats["samples_total"]
+        return self.stats["samples_reused"] / total if total else 0.0
+
+
+class EventRecorder:
+    """Collects alignment records of a sentence rendered on its own, to replay at an offset"""
+
+    def __init__(self):
+        self.events = []
+
+    def record(self, token, kind, start, end):
+        self.events.append((token, kind, start, end))
+
+
+def iter_sentence_pieces(syllables, max_tokens=MAX_CACHED_SENTENCE):
+    """Sentences of a syllable stream; longer ones come in pieces of `max_tokens`
+    that do not end with "<eos>" and are never cached"""
+    piece = []
+    for syl in syllables:
+        piece.append(syl)
+        if syl == "<eos>" or len(piece) >= max_tokens:
+            yield piece
+            piece = []
+    if piece:
+        yield piece
+
+
+class WavSink:
+    """Writes int16 blocks to a WAV file as they arrive"""
+
+    def __init__(self, path, sample_rate=SAMPLE_RATE):
+        self.file = wave.open(path, "wb")
+        self.file.setnchannels(CHANNELS)
+        self.file.setsampwidth(SAMPLE_WIDTH)
+        self.file.setframerate(sample_rate)
+        self.samples_written = 0
+
+    def write(self, samples):
+        self.file.writeframes(np.ascontiguousarray(samples, dtype=np.int16).tobytes())
+        self.samples_written += len(samples)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def quantize_speed(speed):
+    """Speaking speed rounded to a multiple of SPEED_STEP"""
+    return round(max(1, round(float(speed) / SPEED_STEP)) * SPEED_STEP, 2)
+
+
+def pause_lengths(speed=1.0, pauses=None):
+    """Pause milliseconds per token (None for a missing unit) at speaking speed `speed`.
+
+    Default pauses scale with the speed; lengths given in `pauses` are used as is.
+    """
+    speed = quantize_speed(speed)
+    lengths = {token: ms / speed for token, ms in PAUSE_TOKENS.items()}
+    lengths[None] = MISSING_PAUSE_MS / speed
+    if pauses:
+        lengths.update(pauses)
+    return lengths
+
+
+def block_samples_for(memory_limit):
+    """Largest output block that keeps the render working set under `memory_limit` bytes"""
+    return max(SAMPLE_RATE, memory_limit // BYTES_PER_BLOCK_SAMPLE)
+
+
+class SynthesisEngine:
+    """Holds the unit inventory and prepared units; safe to share between threads"""
+
+    def __init__(self, audio_dir=None, sample_rate=SAMPLE_RATE, inventory_db=None):
+        self.audio_dir = audio_dir if audio_dir is not None else resource_path("AudioDB")
+        self.sample_rate = sample_rate
+        # Units built offline by `inventory.py build`; anything missing or stale is prepared here
+        self.inventory_db = inventory_db if inventory_db is not None else resource_path(INVENTORY_DB)
+        if not os.path.exists(self.inventory_db):
+            self.inventory_db = None
+        self.unit_format = (sample_rate, SAMPLE_WIDTH, CHANNELS)
+        if self.inventory_db is not None:
+            built_format = recorded_format(self.inventory_db)
+            if built_format is not None and built_format != self.unit_format:
+                raise FormatMismatch(f"{self.inventory_db} holds {describe_format(built_format)} units, "
+                                     f"expected {describe_format(self.unit_format)}; rebuild it")
+        self.inventory = {
+            file[:-4]: os.path.join(self.audio_dir, file)
+            for file in os.listdir(self.audio_dir) if file.endswith(".wav")
+        }
+        if self.inventory_db is None:
+            self._check_formats()
+        self.units = UnitCache(self._load_unit)
+        # Least recently used last; the recorded units (self.units) are never dropped
+        self.rate_units = OrderedDict()
+        self.rate_lock = threading.Lock()
+
+    def _check_formats(self):
+        """Without a built inventory every unit is used as recorded; fail now rather than render silence"""
+        wrong = {}
+        for syllable, path in self.inventory.items():
+            try:
+                unit_format = wav_format(path)
+            except (wave.Error, EOFError, OSError):
+                continue  # unreadable files are reported per unit while rendering
+            if unit_format != self.unit_format:
+                wrong[syllable] = unit_format
+        if wrong:
+            listed = ", ".join(f"'{syl}' ({describe_format(fmt)})" for syl, fmt in sorted(wrong.items())[:5])
+            more = f" and {len(wrong) - 5} more" if len(wrong) > 5 else ""
+            raise FormatMismatch(f"units {listed}{more} are not {describe_format(self.unit_format)}; "
+                                 f"run `python inventory.py build`")
+
+    def _load_unit(self, syllable):
+        if self.inventory_db is not None:
+            with span("load_unit"):
+                built = load_unit(self.inventory_db, syllable, self.inventory[syllable])
+            if built is not None:
+                samples = built[1]
+                samples.flags.writeable = False
+                return samples
+        with span("prepare_unit"):
+            seg = prepare_segment(self.inventory[syllable])
+            # Units are never resampled while rendering; `inventory.py build` converts them
+            unit_format = (seg.frame_rate, seg.sample_width, seg.channels)
+            if unit_format != self.unit_format:
+                raise FormatMismatch(f"unit '{syllable}' is {describe_format(unit_format)}, expected "
+                                     f"{describe_format(self.unit_format)}; run `python inventory.py build`")
+            return segment_to_samples(seg)
+
+    def has_unit(self, syllable):
+        return syllable in self.inventory
+
+    def units_at(self, rate=None, speed=1.0):
+        """Unit cache for output rate `rate` and speaking speed `speed`; each unit
+        is resampled once per rate and time-stretched once per (rate, speed).
+        `rate` must be one of OUTPUT_RATES; `speed` is rounded to SPEED_STEP."""
+        rate = rate or self.sample_rate
+        if rate != self.sample_rate and rate not in OUTPUT_RATES:
+            raise ValueError(f"unsupported output rate {rate}, expected one of {', '.join(map(str, OUTPUT_RATES))}")
+        key = (rate, quantize_speed(speed))
+        if key == (self.sample_rate, 1.0):
+            return self.units
+        with self.rate_lock:
+            cache = self.rate_units.get(key)
+            if cache is None:
+                cache = self.rate_units[key] = UnitCache(lambda syl: self._derive_unit(syl, *key))
+                while len(self.rate_units) > MAX_RATE_CACHES:
+                    self.rate_units.popitem(last=False)
+            else:
+                self.rate_units.move_to_end(key)
+            return cache
+
+    def _derive_unit(self, syllable, rate, speed):
+        if speed != 1.0:
+            with span("stretch_unit"):
+                samples = time_stretch(self.units_at(rate).get(syllable), speed, rate)
+        else:
+            with span("resample_unit"):
+                samples = resample(self.units.get(syllable), self.sample_rate, rate)
+        samples.flags.writeable = False
+        return samples
+
+    def unit(self, syllable, rate=None, speed=1.0):
+        """Prepared samples for a syllable at output rate `rate`, or None if it has no recording"""
+        if syllable not in self.inventory:
+            return None
+        return self.units_at(rate, speed).get(syllable)
+
+    def frontend(self, text):
+        with span("normalize"):
+            normalized = normalize_text(text)
+        with span("syllabify"):
+            return syllabify_normalized(normalized)
+
+    def missing_syllables(self, syllables):
+        return {syl for syl in syllables if syl not in PAUSE_TOKENS and syl not in self.inventory}
+
+    def _assemble(self, out, syllables, units, pauses, block_samples=None, alignment=None):
+        """Feed syllables into the assembler; stop early once `block_samples` are pending.
+
+        Returns True when `syllables` is exhausted. Every token's output range is
+        recorded in `alignment` if one is given.
+        """
+        resolved = 0
+        try:
+            for syl in syllables:
+                if syl in pauses:
+                    kind, start = PAUSE, out.pause(pauses[syl])
+                else:
+                    try:
+                        samples = units.get(syl) if syl in self.inventory else None
+                        if samples is None:
+                            print(f"Missing syllable: {syl}")
+                            count("units_missing")
+                    except FormatMismatch:
+                        raise
+                    except Exception as e:
+                        print(f"Error processing syllable '{syl}': {e}")
+                        samples = None
+                    if samples is None:
+                        kind, start = MISSING, out.pause(pauses[None])
+                    else:
+                        kind, start = UNIT, out.add(samples)
+                        resolved += 1
+                if alignment is not None:
+                    alignment.record(syl, kind, start, out.produced + len(out))
+                if block_samples and len(out) >= block_samples:
+                    return False
+            return True
+        finally:
+            count("units_resolved", resolved)
+
+    def _assemble_sentences(self, out, sentences, units, pauses, block_samples, alignment, cache, settings):
+        """Like _assemble, sentence by sentence, reusing repeated sentences from `cache`"""
+        stats = cache.stats
+        for sentence in sentences:
+            complete = sentence[-1] == "<eos>"
+            stats["sentences"] += complete
+            before = out.produced + len(out)
+            # The first sentence of a render starts from nothing rather than from a pause
+            fresh = before == 0
+            if not complete or not (fresh or out.silent_tail()):
+                stats["uncached"] += complete
+                self._assemble(out, sentence, units, pauses, None, alignment)
+            else:
+                key = (settings, fresh, tuple(sentence))
+                entry = cache.get(key)
+                if entry is None:
+                    scratch = Assembler(out.sample_rate)
+                    if not fresh:
+                        scratch.start_from_silence()
+                    # Always recorded: a cache may be shared by renders with and without alignment
+                    events = EventRecorder()
+                    self._assemble(scratch, sentence, units, pauses, None, events)
+                    entry = (scratch.samples(), events.events)
+                    entry[0].flags.writeable = False
+                    cache.put(key, entry)
+                    stats["rendered"] += 1
+                else:
+                    stats["reused"] += 1
+                    stats["units_reused"] += sum(1 for syl in sentence if syl not in pauses)
+                    stats["samples_reused"] += len(entry[0]) - (0 if fresh else out.crossfade)
+                    count("sentences_reused")
+                block, events = entry
+                offset = out.splice(block)
+                if alignment is not None:
+                    for token, kind, start, end in events:
+                        alignment.record(token, kind, None if start is None else start + offset, end + offset)
+            stats["samples_total"] += out.produced + len(out) - before
+            if block_samples and len(out) >= block_samples:
+                return False
+        return True
+
+    def render_blocks(self, syllables, seed=None, block_samples=None, rate=None, speed=1.0, pauses=None,
+                      alignment=None, sentence_cache=None):
+        """Yield the rendered output in blocks of about `block_samples` samples.
+
+        Joining the blocks gives exactly what render() returns. With a
+        SentenceCache, repeated sentences are assembled only once.
+        """
+        out = Assembler(rate or self.sample_rate)
+        units = self.units_at(rate, speed)
+        pauses = pause_lengths(speed, pauses)
+        noise = NoiseSource(seed=seed)
+        syllables = iter(syllables)
+        if sentence_cache is not None:
+            sentences = iter_sentence_pieces(syllables)
+            settings = (out.sample_rate, float(speed), tuple(sorted(pauses.items(), key=str)))
+        while True:
+            with span("concatenate"):
+                if sentence_cache is None:
+                    finished = self._assemble(out, syllables, units, pauses, block_samples, alignment)
+                else:
+                    finished = self._assemble_sentences(out, sentences, units, pauses, block_samples, alignment,
+                                                        sentence_cache, settings)
+                block = out.samples() if finished else out.drain(out.crossfade)
+            with span("noise"):
+                block = noise.apply(block)
+            if len(block):
+                yield block
+            if finished:
+                return
+
+    def render(self, syllables, seed=None, rate=None, speed=1.0, pauses=None, sentence_cache=None):
+        """Assemble a syllable stream into int16 samples at output rate `rate`"""
+        blocks = list(self.render_blocks(syllables, seed, None, rate, speed, pauses, sentence_cache=sentence_cache))
+        if len(blocks) == 1:
+            return blocks[0]
+        return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.int16)
+
+    def synthesize_syllables(self, syllables, seed=None, rate=None, speed=1.0, pauses=None, sentence_cache=None):
+        samples = self.render(syllables, seed, rate, speed, pauses, sentence_cache)
+        count("bytes_produced", samples.nbytes)
+        with span("encode"):
+            return samples_to_segment(samples, rate or self.sample_rate)
+
+    def synthesize(self, text, seed=None, rate=None, speed=1.0, pauses=None):
+        """Synthesize text into one AudioSegment"""
+        return self.synthesize_syllables(self.frontend(text), seed, rate, speed, pauses)
+
+    def synthesize_aligned(self, text, seed=None, rate=None, speed=1.0, pauses=None):
+        """Synthesize text and return (AudioSegment, Alignment).
+
+        The alignment maps every unit, word and sentence to its span in the
+        normalized text and its output samples; it is recorded while
+        concatenating, so it costs no extra pass over the audio.
+        """
+        with span("normalize"):
+            normalized = normalize_text(text)
+        with span("syllabify"):
+            spanned = list(iter_syllable_spans(normalized))
+        alignment = Alignment(normalized, [(start, end) for _, start, end in spanned], rate or self.sample_rate)
+        blocks = list(self.render_blocks((syl for syl, _, _ in spanned), seed, None, rate, speed, pauses, alignment))
+        samples = np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.int16)
+        count("bytes_produced", samples.nbytes)
+        with span("encode"):
+            return samples_to_segment(samples, rate or self.sample_rate), alignment
+
+    def frontend_chunks(self, parts, chunk_chars=BOUNDED_CHUNK_CHARS):
+        """Syllable stream for long input, normalized chunk by chunk"""
+        for chunk in iter_text_chunks(parts, chunk_chars):
+            yield from self.frontend(chunk)
+
+    def frontend_stream(self, parts, chunk_chars=BOUNDED_CHUNK_CHARS, workers=None):
+        """frontend_parallel() when `workers` > 1, otherwise frontend_chunks(); both give the same stream"""
+        if workers is not None and workers > 1:
+            return self.frontend_parallel(parts, workers, chunk_chars)
+        return self.frontend_chunks(parts, chunk_chars)
+
+    def frontend_parallel(self, parts, workers=None, chunk_chars=BOUNDED_CHUNK_CHARS, batch=FRONTEND_BATCH):
+        """Syllable stream for long input with the frontend run in a process pool.
+
+        The text is cut into paragraph chunks as in frontend_chunks, and batches
+        of `batch` chunks are submitted as pool tasks. Every chunk ends at a word
+        end, so each word's <s>/<eos> marker stays with its own chunk and the
+        batches' results concatenated in order equal frontend_chunks(). Only a
+        few tasks per worker are in flight, which keeps memory bounded.
+        """
+        workers = workers or os.cpu_count() or 1
+        chunks = iter_text_chunks(parts, chunk_chars)
+        pool = ProcessPoolExecutor(max_workers=workers)
+        pending = deque()
+        try:
+            while True:
+                chunk_batch = list(islice(chunks, batch))
+                if chunk_batch:
+                    pending.append(pool.submit(syllabify_chunks, chunk_batch))
+                if not pending:
+                    return
+                if not chunk_batch or len(pending) >= workers * FRONTEND_TASKS_PER_WORKER:
+                    with span("frontend_wait"):
+                        syllables = pending.popleft().result()
+                    yield from syllables
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def synthesize_to_sink(self, parts, sink, seed=None, memory_limit=DEFAULT_MEMORY_LIMIT,
+                           chunk_chars=BOUNDED_CHUNK_CHARS, rate=None, speed=1.0, pauses=None, sentence_cache=None,
+                           workers=None):
+        """Bounded-memory synthesis of a long text (a string or an iterable of paragraphs).
+
+        Text is normalized in paragraph chunks and output is written to `sink` in
+        blocks sized from `memory_limit`, so neither the normalized text nor the
+        full audio is ever held at once. The output equals synthesize() for the
+        same text. When tracemalloc is running, exceeding the limit raises
+        MemoryLimitExceeded. Returns the number of samples written.
+
+        Pass a SentenceCache to assemble repeated sentences only once; its
+        stats report the work saved and its size counts towards the limit.
+        With `workers` > 1 the frontend runs in that many processes.
+        """
+        return self.render_to_sink(self.frontend_stream(parts, chunk_chars, workers), sink, seed, memory_limit,
+                                   rate, speed, pauses, sentence_cache)
+
+    def render_to_sink(self, syllables, sink, seed=None, memory_limit=DEFAULT_MEMORY_LIMIT, rate=None,
+                       speed=1.0, pauses=None, sentence_cache=None):
+        """Render a syllable stream to `sink` block by block; see synthesize_to_sink"""
+        baseline = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        written = 0
+        for block in self.render_blocks(syllables, seed, block_samples_for(memory_limit), rate, speed, pauses,
+                                        sentence_cache=sentence_cache):
+            with span("write"):
+                sink.write(block)
+            written += len(block)
+            count("bytes_produced", block.nbytes)
+            if baseline is not None and tracemalloc.get_traced_memory()[0] - baseline > memory_limit:
+                raise MemoryLimitExceeded(f"synthesis working set exceeded {memory_limit} bytes")
+        return written
+
+    def synthesize_stream(self, text, seed=None, rate=None, speed=1.0, pauses=None):
+        """Yield one AudioSegment per sentence as soon as it is rendered"""
+        for index, sentence in enumerate(split_sentences(self.frontend(text))):
+            yield self.synthesize_syllables(sentence, sentence_seed(seed, index), rate, speed, pauses)
+
+    def prepare(self, syllables, workers=None, rate=None, speed=1.0):
+        """Prepare every distinct known unit in `syllables` once, in parallel"""
+        units = self.units_at(rate, speed)
+        needed = [syl for syl in unique_syllables(syllables)
+                  if syl in self.inventory and syl not in units]
+        if len(needed) <= 1 or workers == 1:
+            for syl in needed:
+                self._prefetch(units, syl)
+            return
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(bind(self._prefetch), [units] * len(needed), needed))
+
+    def _prefetch(self, units, syllable):
+        # A unit that fails to load is not cached; _assemble reports it and leaves a pause.
+        # A unit in the wrong format is a setup error and stops the batch.
+        try:
+            units.get(syllable)
+        except FormatMismatch:
+            raise
+        except Exception:
+            count("prefetch_errors")
+
+    def synthesize_many(self, texts, seed=None, workers=None, rate=None, speed=1.0, pauses=None):
+        """Synthesize a batch: run the frontend for all texts, prepare the union of
+        their units once, then assemble every output from the shared prepared set."""
+        syllable_lists = [self.frontend(text) for text in texts]
+        self.prepare((syl for syllables in syllable_lists for syl in syllables), workers, rate, speed)
+        return [self.synthesize_syllables(syllables, seed, rate, speed, pauses) for syllables in syllable_lists]
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """The process-wide engine instance shared by the GUI and headless entry points"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = SynthesisEngine()
+        return _engine
@@ -0,0 +1,177 @@
+import re
+
+from PyQt6.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+from PyQt6.QtGui import QSyntaxHighlighter, QTextBlockUserData, QTextCharFormat, QColor
+
+from Functions import preprocess_and_syllabify, syllabify_georgian
+from db import available_syllables
+
+GEORGIAN_LETTERS = "აბგდევზთიკლმნოპჟრსტუფქღყშჩცძწჭხჯჰ"
+
+# Letters (\w minus digits and underscore) that are not Georgian
+NON_GEORGIAN_LETTER_RE = re.compile(rf'[^\W\d_{GEORGIAN_LETTERS}]')
+WORD_RE = re.compile(r'\S+')
+GEORGIAN_WORD_RE = re.compile(rf'[{GEORGIAN_LETTERS}]+')
+PUNCTUATION_RE = re.compile(r'^[.,!?;:"„"–]+|[.,!?;:"„"–]+$')
+
+
+def find_missing_syllables(word, inventory):
+    """Return [(offset, length, syllable)] for syllables of `word` that have no recording.
+
+    Plain Georgian words are syllabified in place so each missing syllable can be
+    located; anything else (numbers, abbreviations) goes through the full frontend
+    and is flagged as a whole.
+    """
+    if GEORGIAN_WORD_RE.fullmatch(word):
+        missing = []
+        offset = 0
+        for syl in syllabify_georgian(word):
+            offset = word.index(syl, offset)
+            if syl not in inventory:
+                missing.append((offset, len(syl), syl))
+            offset += len(syl)
+        return missing
+    sylls = [s for s in preprocess_and_syllabify(word) if s not in ("<s>", "<eos>")]
+    return [(0, len(word), s) for s in sylls if s not in inventory]
+
+
+class BlockIssues(QTextBlockUserData):
+    """Validation results attached to one text block"""
+
+    def __init__(self, invalid_letters, missing, pending):
+        super().__init__()
+        self.invalid_letters = invalid_letters
+        self.missing = missing
+        self.pending = pending
+
+
+class Issues:
+    """Document-wide summary of validation results"""
+
+    def __init__(self):
+        self.invalid_letters = []
+        self.missing = {}
+
+    def add_missing(self, syllable, line):
+        self.missing.setdefault(syllable, [])
+        if line not in self.missing[syllable]:
+            self.missing[syllable].append(line)
+
+
+class SyllableLookupWorker(QObject):
+    """Resolves words against the syllable inventory away from the UI thread"""
+    resolved = pyqtSignal(dict)
+
+    def __init__(self, inventory):
+        super().__init__()
+        self.inventory = inventory
+
+    @pyqtSlot(list)
+    def lookup(self, words):
+        self.resolved.emit({word: find_missing_syllables(word, self.inventory) for word in words})
+
+
+class GeorgianValidator(QSyntaxHighlighter):
+    """Marks non-Georgian letters and syllables missing from the inventory.
+
+    Qt only re-runs highlightBlock for edited blocks. Word lookups are cached and
+    unknown words are resolved on a worker thread; affected blocks are re-highlighted
+    once their results arrive.
+    """
+    lookup_requested = pyqtSignal(list)
+
+    def __init__(self, document, inventory=None):
+        super().__init__(document)
+        self.inventory = inventory if inventory is not None else available_syllables()
+        self.word_cache = {}
+        self.requested = set()
+        self.waiting_blocks = {}
+
+        self.invalid_format = QTextCharFormat()
+        self.invalid_format.setUnderlineColor(QColor("red"))
+        self.invalid_format.setUnderlineStyle(QTextCharFormat.UnderlineStyle.WaveUnderline)
+        self.missing_format = QTextCharFormat()
+        self.missing_format.setBackground(QColor("#ffd8a8"))
+
+        self.worker_thread = QThread()
+        self.worker = SyllableLookupWorker(self.inventory)
+        self.worker.moveToThread(self.worker_thread)
+        self.lookup_requested.connect(self.worker.lookup)
+        self.worker.resolved.connect(self.on_resolved)
+        self.worker_thread.start()
+
+    def stop(self):
+        """Stop the lookup thread"""
+        self.worker_thread.quit()
+        self.worker_thread.wait()
+
+    def highlightBlock(self, text):
+        invalid = []
+        for match in NON_GEORGIAN_LETTER_RE.finditer(text):
+            self.setFormat(match.start(), 1, self.invalid_format)
+            invalid.append(match.start())
+
+        missing = []
+        unknown = []
+        for match in WORD_RE.finditer(text):
+            word = PUNCTUATION_RE.sub("", match.group())
+            if not word or NON_GEORGIAN_LETTER_RE.search(word):
+                continue
+            result = self.word_cache.get(word)
+            if result is None:
+                unknown.append(word)
+                continue
+            start = match.start() + match.group().index(word)
+            for offset, length, syl in result:
+                self.setFormat(start + offset, length, self.missing_format)
+                missing.append(syl)
+
+        self.setCurrentBlockUserData(BlockIssues(invalid, missing, bool(unknown)))
+        if unknown:
+            self.request(unknown, self.currentBlock())
+
+    def request(self, words, block):
+        new_words = []
+        for word in words:
+            self.waiting_blocks.setdefault(word, []).append(block)
+            if word not in self.requested:
+                self.requested.add(word)
+                new_words.append(word)
+        if new_words:
+            self.lookup_requested.emit(new_words)
+
+    def on_resolved(self, results):
+        self.word_cache.update(results)
+        blocks = []
+        for word in results:
+            self.requested.discard(word)
+            blocks.extend(self.waiting_blocks.pop(word, []))
+        seen = set()
+        for block in blocks:
+            if block.isValid() and block.blockNumber() not in seen:
+                seen.add(block.blockNumber())
+                self.rehighlightBlock(block)
+
+    def resolve_pending(self):
+        """Synchronously resolve words that are still waiting for the worker"""
+        pending = [word for word in self.waiting_blocks if word not in self.word_cache]
+        if pending:
+            self.on_resolved({word: find_missing_syllables(word, self.inventory) for word in pending})
+
+    def collect_issues(self):
+        """Summarise validation results with 1-based line numbers"""
+        self.resolve_pending()
+        issues = Issues()
+        block = self.document().begin()
+        while block.isValid():
+            data = block.userData()
+            if isinstance(data, BlockIssues):
+                if data.pending:
+                    self.rehighlightBlock(block)
+                    data = block.userData()
+                line = block.blockNumber() + 1
+                issues.invalid_letters.extend((line, col + 1) for col in data.invalid_letters)
+                for syl in data.missing:
+                    issues.add_missing(syl, line)
+            block = block.next()
+        return issues
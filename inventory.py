@@ -0,0 +1,314 @@
+"""Offline build of the prepared unit inventory.
+
+`python inventory.py build` scans AudioDB and runs every recording through
+decode -> normalize -> high-pass -> trim -> fade -> resample in a process pool,
+computes per-unit metadata (duration, peak, RMS, boundary energy, edge pitch)
+and stores the prepared samples in tts_inventory.db. Only new or changed files
+are processed again, and results are committed as they arrive. The engine
+loads units from the built inventory instead of preparing them at runtime.
+
+Every unit is stored in one canonical format (CANONICAL_FORMAT). Recordings in
+any other format are converted during the build and reported, and the format
+is recorded in the database so the synthesizer can check it once instead of
+converting units while it renders.
+
+Packaging: `pyinstaller Interface.spec` runs this build first and bundles
+tts_inventory.db next to tts_syllables.db, so the frozen app loads prepared
+units; without it every unit would be prepared at runtime.
+"""
+import os
+import sys
+import time
+import wave
+import sqlite3
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from utils import resource_path
+
+# === Constants ===
+INVENTORY_DB = "tts_inventory.db"
+# Bump when the preparation steps change, so every unit is rebuilt
+PIPELINE_VERSION = 1
+# Canonical unit format: 44.1 kHz, 16-bit, mono
+SAMPLE_RATE = 44100
+SAMPLE_WIDTH = 2
+CHANNELS = 1
+CANONICAL_FORMAT = (SAMPLE_RATE, SAMPLE_WIDTH, CHANNELS)
+EDGE_MS = 10
+PITCH_EDGE_MS = 50
+PITCH_FLOOR = 75
+PITCH_CEILING = 600
+COMMIT_EVERY = 200
+
+SCHEMA = '''CREATE TABLE IF NOT EXISTS units (
+                syllable TEXT PRIMARY KEY,
+                source_path TEXT,
+                source_size INTEGER,
+                source_mtime_ns INTEGER,
+                pipeline_version INTEGER,
+                sample_rate INTEGER,
+                samples BLOB,
+                duration_ms REAL,
+                peak_dbfs REAL,
+                rms_dbfs REAL,
+                head_energy_db REAL,
+                tail_energy_db REAL,
+                head_pitch_hz REAL,
+                tail_pitch_hz REAL,
+                built_at REAL)'''
+META_SCHEMA = "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+
+
+class FormatMismatch(ValueError):
+    pass
+
+
+def inventory_db_path(db_path=None):
+    return db_path if db_path is not None else resource_path(INVENTORY_DB)
+
+
+def connect(db_path=None):
+    conn = sqlite3.connect(inventory_db_path(db_path))
+    conn.execute(SCHEMA)
+    conn.execute(META_SCHEMA)
+    return conn
+
+
+def describe_format(fmt):
+    sample_rate, sample_width, channels = fmt
+    return f"{sample_rate} Hz / {sample_width * 8}-bit / {channels} ch"
+
+
+def wav_format(path):
+    """(sample_rate, sample_width, channels) from a WAV header"""
+    with wave.open(path, "rb") as f:
+        return f.getframerate(), f.getsampwidth(), f.getnchannels()
+
+
+def recorded_format(db_path):
+    """Canonical format the inventory at `db_path` was built for, or None if it has none"""
+    conn = sqlite3.connect(db_path)
+    try:
+        values = dict(conn.execute("SELECT key, value FROM meta"))
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+    if not {"sample_rate", "sample_width", "channels"} <= values.keys():
+        return None
+    return int(values["sample_rate"]), int(values["sample_width"]), int(values["channels"])
+
+
+def record_format(conn, fmt):
+    conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                     zip(("sample_rate", "sample_width", "channels"), map(str, fmt)))
+
+
+def source_signature(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def to_dbfs(value):
+    return 20 * np.log10(value / 32768) if value > 0 else None
+
+
+def rms(samples):
+    return float(np.sqrt(np.mean(np.square(samples, dtype=np.float64)))) if len(samples) else 0.0
+
+
+def edge_pitch(samples, sample_rate):
+    """Median F0 of the voiced frames near the start and near the end, or None if unvoiced"""
+    import parselmouth
+
+    sound = parselmouth.Sound(samples.astype(np.float64) / 32768, sampling_frequency=sample_rate)
+    if sound.duration < 3 / PITCH_FLOOR:
+        return None, None
+    pitch = sound.to_pitch(pitch_floor=PITCH_FLOOR, pitch_ceiling=PITCH_CEILING)
+    frequencies = pitch.selected_array["frequency"]
+    times = pitch.xs()
+    edge = PITCH_EDGE_MS / 1000
+
+    def voiced_median(mask):
+        voiced = frequencies[mask & (frequencies > 0)]
+        return float(np.median(voiced)) if len(voiced) else None
+
+    return voiced_median(times <= edge), voiced_median(times >= sound.duration - edge)
+
+
+def unit_metadata(samples, sample_rate):
+    edge = max(1, int(sample_rate * EDGE_MS / 1000))
+    head_pitch, tail_pitch = edge_pitch(samples, sample_rate)
+    return {
+        "duration_ms": len(samples) * 1000 / sample_rate,
+        "peak_dbfs": to_dbfs(int(np.max(np.abs(samples.astype(np.int32))))) if len(samples) else None,
+        "rms_dbfs": to_dbfs(rms(samples)),
+        "head_energy_db": to_dbfs(rms(samples[:edge])),
+        "tail_energy_db": to_dbfs(rms(samples[-edge:])),
+        "head_pitch_hz": head_pitch,
+        "tail_pitch_hz": tail_pitch,
+    }
+
+
+def build_unit(syllable, path, fmt=CANONICAL_FORMAT):
+    """Worker: prepare one recording in the canonical format and measure it; runs in a separate process"""
+    from Functions import prepare_segment
+
+    sample_rate, sample_width, channels = fmt
+    source_format = wav_format(path)
+    seg = prepare_segment(path)
+    if source_format != fmt:
+        seg = seg.set_frame_rate(sample_rate).set_channels(channels).set_sample_width(sample_width)
+    if (seg.frame_rate, seg.sample_width, seg.channels) != fmt:
+        raise FormatMismatch(f"could not convert to {describe_format(fmt)}")
+    samples = np.frombuffer(seg.raw_data, dtype=np.int16)
+    unit = {
+        "syllable": syllable,
+        "samples": samples.tobytes(),
+        "sample_rate": sample_rate,
+        "source_format": source_format,
+    }
+    unit.update(unit_metadata(samples, sample_rate))
+    return unit
+
+
+def stale_units(conn, sources):
+    """Syllables whose recording is new, changed or was built by an older pipeline or for another rate"""
+    built = {
+        row[0]: row[1:]
+        for row in conn.execute(
+            "SELECT syllable, source_path, source_size, source_mtime_ns, pipeline_version, sample_rate FROM units")
+    }
+    stale = []
+    for syllable, path in sources.items():
+        if built.get(syllable) != (path, *source_signature(path), PIPELINE_VERSION, SAMPLE_RATE):
+            stale.append(syllable)
+    return stale
+
+
+def store_unit(conn, unit, path):
+    size, mtime_ns = source_signature(path)
+    conn.execute(
+        '''INSERT OR REPLACE INTO units (syllable, source_path, source_size, source_mtime_ns, pipeline_version,
+               sample_rate, samples, duration_ms, peak_dbfs, rms_dbfs, head_energy_db, tail_energy_db,
+               head_pitch_hz, tail_pitch_hz, built_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+        (unit["syllable"], path, size, mtime_ns, PIPELINE_VERSION, unit["sample_rate"], unit["samples"],
+         unit["duration_ms"], unit["peak_dbfs"], unit["rms_dbfs"], unit["head_energy_db"],
+         unit["tail_energy_db"], unit["head_pitch_hz"], unit["tail_pitch_hz"], time.time()))
+
+
+def scan_sources(audio_dir):
+    return {
+        file[:-4]: os.path.join(audio_dir, file)
+        for file in sorted(os.listdir(audio_dir)) if file.endswith(".wav")
+    }
+
+
+def build_inventory(audio_dir=None, db_path=None, workers=None, force=False, progress=None, strict=False):
+    """Prepare every new or changed recording of `audio_dir` into the inventory DB.
+
+    Recordings that are not in the canonical format are converted and listed
+    under "converted"; with strict=True they fail instead. Returns a summary
+    dict with built, unchanged, removed, converted and failed entries.
+    """
+    audio_dir = audio_dir if audio_dir is not None else resource_path("AudioDB")
+    sources = scan_sources(audio_dir)
+    conn = connect(db_path)
+    try:
+        # Units built for another canonical format are all rebuilt
+        if recorded_format(inventory_db_path(db_path)) not in (None, CANONICAL_FORMAT):
+            force = True
+        removed = [row[0] for row in conn.execute("SELECT syllable FROM units") if row[0] not in sources]
+        conn.executemany("DELETE FROM units WHERE syllable = ?", [(syl,) for syl in removed])
+        todo = list(sources) if force else stale_units(conn, sources)
+        unchanged = len(sources) - len(todo)
+        failed = {}
+        converted = {}
+        built = 0
+        if strict:
+            for syllable in list(todo):
+                source_format = wav_format(sources[syllable])
+                if source_format != CANONICAL_FORMAT:
+                    failed[syllable] = f"{describe_format(source_format)}, expected {describe_format(CANONICAL_FORMAT)}"
+                    todo.remove(syllable)
+        if todo:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(build_unit, syl, sources[syl]): syl for syl in todo}
+                for future in as_completed(futures):
+                    syllable = futures[future]
+                    try:
+                        unit = future.result()
+                        store_unit(conn, unit, sources[syllable])
+                    except Exception as e:
+                        failed[syllable] = str(e)
+                        continue
+                    if unit["source_format"] != CANONICAL_FORMAT:
+                        converted[syllable] = describe_format(unit["source_format"])
+                    built += 1
+                    if built % COMMIT_EVERY == 0:
+                        conn.commit()
+                    if progress:
+                        progress(built + len(failed), len(todo))
+        # Only now: if the build dies midway, the old marker makes the next run rebuild everything
+        record_format(conn, CANONICAL_FORMAT)
+        conn.commit()
+    finally:
+        conn.close()
+    return {
+        "units": len(sources),
+        "built": built,
+        "unchanged": unchanged,
+        "removed": len(removed),
+        "converted": converted,
+        "failed": failed,
+    }
+
+
+def load_unit(db_path, syllable, source_path):
+    """Prepared samples from the inventory, or None if the unit is missing, out of date or at another rate"""
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute(
+            "SELECT source_size, source_mtime_ns, pipeline_version, sample_rate, samples FROM units WHERE syllable = ?",
+            (syllable,)).fetchone()
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+    if row is None or row[:4] != (*source_signature(source_path), PIPELINE_VERSION, SAMPLE_RATE):
+        return None
+    return row[3], np.frombuffer(row[4], dtype=np.int16)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the prepared unit inventory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="prepare new and changed recordings")
+    build.add_argument("--audio-dir", default=None)
+    build.add_argument("--db", default=None, help=f"inventory database (default {INVENTORY_DB})")
+    build.add_argument("--workers", type=int, default=None)
+    build.add_argument("--force", action="store_true", help="rebuild every unit")
+    build.add_argument("--strict", action="store_true",
+                       help=f"reject recordings that are not {describe_format(CANONICAL_FORMAT)} instead of converting")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    summary = build_inventory(args.audio_dir, args.db, args.workers, args.force,
+                              progress=lambda done, total: print(f"\r{done}/{total}", end="", file=sys.stderr),
+                              strict=args.strict)
+    print(file=sys.stderr)
+    for syllable, source_format in sorted(summary["converted"].items()):
+        print(f"Converted {syllable}: {source_format} -> {describe_format(CANONICAL_FORMAT)}")
+    for syllable, error in summary["failed"].items():
+        print(f"Error processing {syllable}: {error}")
+    print(f"{summary['built']} built, {summary['unchanged']} unchanged, {summary['removed']} removed, "
+          f"{len(summary['converted'])} converted, {len(summary['failed'])} failed in {time.perf_counter() - start:.1f} s")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
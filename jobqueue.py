@@ -0,0 +1,405 @@
+"""Durable batch rendering queue in SQLite.
+
+`python jobqueue.py submit BOOK.docx ...` normalizes each document once,
+splits it into chunks of consecutive sentences and stores them in the queue
+database (tts_jobs.db by default). Any number of `python jobqueue.py work`
+processes, on one machine or on several machines sharing the filesystem, then
+lease chunks, render each to its own WAV file next to the job output and mark
+it done. A lease that is not completed in time (the worker crashed or was
+killed) expires and the chunk is handed to another worker; finished chunks are
+never leased again. When every chunk of a job is done, the chunk files are
+stitched into the job output in order.
+
+    python jobqueue.py submit book.docx --out book.wav
+    python jobqueue.py work --workers 4
+    python jobqueue.py status
+"""
+import os
+import sys
+import json
+import time
+import socket
+import shutil
+import sqlite3
+import argparse
+from multiprocessing import Process
+
+from utils import resource_path
+
+# === Constants ===
+JOBS_DB = "tts_jobs.db"
+CHUNK_SENTENCES = 50
+LEASE_SECONDS = 300
+# A stitch that has not finished in this time is assumed dead and may be taken over
+STITCH_SECONDS = 300
+MAX_ATTEMPTS = 3
+POLL_SECONDS = 2
+BUSY_TIMEOUT = 30
+CHUNK_DIR_SUFFIX = ".chunks"
+
+PENDING, LEASED, DONE, FAILED = "pending", "leased", "done", "failed"
+STITCHING = "stitching"
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS jobs (
+           id INTEGER PRIMARY KEY,
+           document TEXT,
+           output TEXT,
+           status TEXT,
+           seed INTEGER,
+           rate INTEGER,
+           speed REAL,
+           chunks INTEGER,
+           created_at REAL,
+           finished_at REAL,
+           stitch_expires REAL)''',
+    '''CREATE TABLE IF NOT EXISTS chunks (
+           job_id INTEGER,
+           idx INTEGER,
+           first_sentence INTEGER,
+           last_sentence INTEGER,
+           text TEXT,
+           status TEXT,
+           worker TEXT,
+           lease_expires REAL,
+           attempts INTEGER DEFAULT 0,
+           samples INTEGER,
+           error TEXT,
+           path TEXT,
+           PRIMARY KEY (job_id, idx))''',
+    "CREATE INDEX IF NOT EXISTS chunks_status ON chunks (status, lease_expires)",
+]
+# Columns added after the first schema: (table, column, type)
+COLUMNS = [
+    ("jobs", "stitch_expires", "REAL"),
+    ("chunks", "path", "TEXT"),
+]
+
+
+def jobs_db_path(db_path=None):
+    return db_path if db_path is not None else resource_path(JOBS_DB)
+
+
+def connect(db_path=None):
+    """Autocommit connection; writes that must be atomic use BEGIN IMMEDIATE"""
+    conn = sqlite3.connect(jobs_db_path(db_path), timeout=BUSY_TIMEOUT, isolation_level=None)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    for table, column, kind in COLUMNS:
+        if column not in [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]:
+            try:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+            except sqlite3.OperationalError:
+                pass  # another process added it first
+    return conn
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def chunk_dir(output):
+    return output + CHUNK_DIR_SUFFIX
+
+
+def chunk_path(output, idx, worker):
+    """Each worker renders to its own file, so a worker that lost its lease cannot overwrite the new holder's"""
+    tag = worker.replace(":", "-").replace(os.sep, "-")
+    return os.path.join(chunk_dir(output), f"{idx:06d}.{tag}.wav")
+
+
+def iter_sentence_chunks(sentences, chunk_sentences=CHUNK_SENTENCES):
+    """(first_sentence, last_sentence, text) for consecutive runs of `chunk_sentences` sentences"""
+    batch = []
+    first = 0
+    for index, sentence in enumerate(sentences):
+        batch.append(sentence)
+        if len(batch) == chunk_sentences:
+            yield first, index, " ".join(batch)
+            batch = []
+            first = index + 1
+    if batch:
+        yield first, first + len(batch) - 1, " ".join(batch)
+
+
+def submit(conn, document, output=None, seed=None, rate=None, speed=1.0, chunk_sentences=CHUNK_SENTENCES):
+    """Normalize `document` and queue it as sentence-range chunks; returns the job id"""
+    from readers import iter_document
+    from Functions import iter_normalized_sentences
+
+    output = os.path.abspath(output or os.path.splitext(document)[0] + ".wav")
+    sentences = iter_normalized_sentences(part + "\n" for part in iter_document(document))
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        job_id = conn.execute(
+            "INSERT INTO jobs (document, output, status, seed, rate, speed, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (os.path.abspath(document), output, PENDING, seed, rate, speed, time.time())).lastrowid
+        count = 0
+        for idx, (first, last, text) in enumerate(iter_sentence_chunks(sentences, chunk_sentences)):
+            conn.execute(
+                "INSERT INTO chunks (job_id, idx, first_sentence, last_sentence, text, status) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, idx, first, last, text, PENDING))
+            count += 1
+        conn.execute("UPDATE jobs SET chunks = ? WHERE id = ?", (count, job_id))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return job_id
+
+
+def lease(conn, worker, lease_seconds=LEASE_SECONDS):
+    """Claim the next pending or expired chunk: (job_id, idx, text, output, seed, rate, speed) or None"""
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # A worker that crashes never calls release(), so expired leases count against MAX_ATTEMPTS here
+        conn.execute(
+            "UPDATE chunks SET status = ?, lease_expires = NULL, error = 'lease expired ' || attempts || ' times' "
+            "WHERE status = ? AND lease_expires < ? AND attempts >= ?", (FAILED, LEASED, now, MAX_ATTEMPTS))
+        row = conn.execute(
+            '''SELECT c.job_id, c.idx, c.text, j.output, j.seed, j.rate, j.speed FROM chunks c
+               JOIN jobs j ON j.id = c.job_id
+               WHERE c.status = ? OR (c.status = ? AND c.lease_expires < ? AND c.attempts < ?)
+               ORDER BY c.job_id, c.idx LIMIT 1''', (PENDING, LEASED, now, MAX_ATTEMPTS)).fetchone()
+        if row is not None:
+            conn.execute(
+                "UPDATE chunks SET status = ?, worker = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE job_id = ? AND idx = ?", (LEASED, worker, now + lease_seconds, row[0], row[1]))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return row
+
+
+def renew(conn, job_id, idx, worker, lease_seconds=LEASE_SECONDS):
+    """Extend a held lease; False if it expired and was taken over"""
+    cursor = conn.execute(
+        "UPDATE chunks SET lease_expires = ? WHERE job_id = ? AND idx = ? AND status = ? AND worker = ?",
+        (time.time() + lease_seconds, job_id, idx, LEASED, worker))
+    return cursor.rowcount == 1
+
+
+def complete(conn, job_id, idx, worker, samples, path):
+    """Mark a chunk done with its rendered file if this worker still holds it"""
+    cursor = conn.execute(
+        "UPDATE chunks SET status = ?, samples = ?, path = ?, lease_expires = NULL, error = NULL "
+        "WHERE job_id = ? AND idx = ? AND status = ? AND worker = ?",
+        (DONE, samples, path, job_id, idx, LEASED, worker))
+    return cursor.rowcount == 1
+
+
+def release(conn, job_id, idx, worker, error):
+    """Give a failed chunk back to the queue, or fail it after MAX_ATTEMPTS"""
+    conn.execute(
+        "UPDATE chunks SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, lease_expires = NULL, error = ? "
+        "WHERE job_id = ? AND idx = ? AND status = ? AND worker = ?",
+        (MAX_ATTEMPTS, FAILED, PENDING, error, job_id, idx, LEASED, worker))
+
+
+class LeasedSink:
+    """WavSink that renews the chunk lease while a long chunk is being written"""
+
+    def __init__(self, sink, renew_lease, lease_seconds):
+        self.sink = sink
+        self.renew_lease = renew_lease
+        self.interval = lease_seconds / 3
+        self.renewed_at = time.monotonic()
+
+    def write(self, samples):
+        self.sink.write(samples)
+        if time.monotonic() - self.renewed_at > self.interval:
+            if not self.renew_lease():
+                raise RuntimeError("lease lost")
+            self.renewed_at = time.monotonic()
+
+
+def render_chunk(engine, text, path, seed, rate, speed, renew_lease, lease_seconds):
+    """Render normalized text to `path`; the file appears only once it is complete"""
+    from engine import WavSink, SentenceCache
+    from Functions import syllabify_normalized
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.part"
+    try:
+        with WavSink(tmp_path, rate or engine.sample_rate) as sink:
+            samples = engine.render_to_sink(syllabify_normalized(text), LeasedSink(sink, renew_lease, lease_seconds),
+                                            seed, rate=rate, speed=speed, sentence_cache=SentenceCache())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return samples
+
+
+def chunk_seed(seed, idx):
+    # Each chunk gets its own noise stream, so that chunks do not repeat the same noise
+    return None if seed is None else seed + idx
+
+
+def stitch(conn, job_id, stitch_seconds=STITCH_SECONDS):
+    """Concatenate the finished chunks of a job into its output; False if it is not ready.
+
+    The stitch is held like a lease: if this process dies, another may take
+    the job over once `stitch_seconds` have passed.
+    """
+    import wave
+    from inventory import SAMPLE_RATE, SAMPLE_WIDTH, CHANNELS
+
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        job = conn.execute("SELECT output, status, stitch_expires, rate FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        remaining = conn.execute("SELECT COUNT(*) FROM chunks WHERE job_id = ? AND status != ?",
+                                 (job_id, DONE)).fetchone()[0]
+        ready = (job is not None and remaining == 0
+                 and (job[1] == PENDING or (job[1] == STITCHING and (job[2] or 0) < now)))
+        if ready:
+            conn.execute("UPDATE jobs SET status = ?, stitch_expires = ? WHERE id = ?",
+                         (STITCHING, now + stitch_seconds, job_id))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    if not ready:
+        return False
+    output = job[0]
+    paths = [path or os.path.join(chunk_dir(output), f"{idx:06d}.wav") for idx, path in conn.execute(
+        "SELECT idx, path FROM chunks WHERE job_id = ? ORDER BY idx", (job_id,))]
+    tmp_path = f"{output}.{socket.gethostname()}.{os.getpid()}.part"
+    try:
+        with wave.open(tmp_path, "wb") as out:
+            # A document without text has no chunks; it still gets a valid (empty) WAV
+            out.setparams((CHANNELS, SAMPLE_WIDTH, job[3] or SAMPLE_RATE, 0, "NONE", "not compressed"))
+            for idx, path in enumerate(paths):
+                with wave.open(path, "rb") as part:
+                    if idx == 0:
+                        out.setparams(part.getparams())
+                    out.writeframes(part.readframes(part.getnframes()))
+        os.replace(tmp_path, output)
+    except BaseException:
+        # Only if it is still ours: a stitcher that took over may already have finished
+        conn.execute("UPDATE jobs SET status = ?, stitch_expires = NULL WHERE id = ? AND status = ?",
+                     (PENDING, job_id, STITCHING))
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    conn.execute("UPDATE jobs SET status = ?, finished_at = ?, stitch_expires = NULL WHERE id = ? AND status = ?",
+                 (DONE, time.time(), job_id, STITCHING))
+    # Also removes files left by workers that lost their lease or crashed mid-render
+    shutil.rmtree(chunk_dir(output), ignore_errors=True)
+    return True
+
+
+def stitch_ready(conn):
+    """Stitch every job whose chunks are all done; returns the stitched job ids"""
+    ready = [row[0] for row in conn.execute(
+        '''SELECT id FROM jobs WHERE (status = ? OR (status = ? AND stitch_expires < ?)) AND NOT EXISTS
+               (SELECT 1 FROM chunks WHERE chunks.job_id = jobs.id AND chunks.status != ?)''',
+        (PENDING, STITCHING, time.time(), DONE))]
+    return [job_id for job_id in ready if stitch(conn, job_id)]
+
+
+def outstanding(conn):
+    """Chunks that are pending or leased by someone (and may still come back)"""
+    return conn.execute("SELECT COUNT(*) FROM chunks WHERE status IN (?, ?)", (PENDING, LEASED)).fetchone()[0]
+
+
+def work(db_path=None, lease_seconds=LEASE_SECONDS, wait=True):
+    """Worker loop: lease, render and complete chunks until the queue is drained.
+
+    With wait=True the worker also waits for chunks leased by others, taking
+    them over if their lease expires. Returns the number of chunks rendered.
+    """
+    from engine import get_engine
+
+    conn = connect(db_path)
+    worker = worker_id()
+    engine = get_engine()
+    rendered = 0
+    try:
+        while True:
+            leased = lease(conn, worker, lease_seconds)
+            if leased is None:
+                stitch_ready(conn)
+                if not wait or outstanding(conn) == 0:
+                    return rendered
+                time.sleep(POLL_SECONDS)
+                continue
+            job_id, idx, text, output, seed, rate, speed = leased
+            path = chunk_path(output, idx, worker)
+            try:
+                samples = render_chunk(engine, text, path, chunk_seed(seed, idx), rate, speed,
+                                       lambda: renew(conn, job_id, idx, worker, lease_seconds), lease_seconds)
+            except Exception as e:
+                print(f"Error rendering chunk {idx} of job {job_id}: {e}")
+                release(conn, job_id, idx, worker, str(e))
+                continue
+            if complete(conn, job_id, idx, worker, samples, path):
+                rendered += 1
+            else:
+                # The lease was taken over; the new holder's file is the one that counts
+                os.remove(path)
+    finally:
+        conn.close()
+
+
+def status(conn):
+    jobs = []
+    for job_id, document, output, job_status, chunks in conn.execute(
+            "SELECT id, document, output, status, chunks FROM jobs ORDER BY id"):
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM chunks WHERE job_id = ? GROUP BY status", (job_id,)))
+        jobs.append({"id": job_id, "document": document, "output": output, "status": job_status,
+                     "chunks": chunks, "chunk_status": counts})
+    return jobs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Durable batch rendering queue")
+    parser.add_argument("--db", default=None, help=f"queue database (default {JOBS_DB})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    submit_parser = sub.add_parser("submit", help="queue documents for rendering")
+    submit_parser.add_argument("documents", nargs="+")
+    submit_parser.add_argument("--out", default=None, help="output WAV (single document only)")
+    submit_parser.add_argument("--seed", type=int, default=None)
+    submit_parser.add_argument("--rate", type=int, default=None)
+    submit_parser.add_argument("--speed", type=float, default=1.0)
+    submit_parser.add_argument("--chunk-sentences", type=int, default=CHUNK_SENTENCES)
+    work_parser = sub.add_parser("work", help="render queued chunks until the queue is drained")
+    work_parser.add_argument("--workers", type=int, default=1, help="worker processes on this machine")
+    work_parser.add_argument("--lease", type=float, default=LEASE_SECONDS, help="lease length in seconds")
+    work_parser.add_argument("--no-wait", action="store_true", help="exit when nothing is left to lease")
+    sub.add_parser("stitch", help="assemble the outputs of finished jobs")
+    sub.add_parser("status", help="print job and chunk states as JSON")
+    args = parser.parse_args(argv)
+
+    if args.command == "submit":
+        if args.out and len(args.documents) > 1:
+            parser.error("--out needs a single document")
+        conn = connect(args.db)
+        for document in args.documents:
+            job_id = submit(conn, document, args.out, args.seed, args.rate, args.speed, args.chunk_sentences)
+            print(f"Job {job_id}: {document}")
+        conn.close()
+    elif args.command == "work":
+        processes = [Process(target=work, args=(args.db, args.lease, not args.no_wait)) for _ in range(args.workers)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        return 1 if any(process.exitcode for process in processes) else 0
+    elif args.command == "stitch":
+        conn = connect(args.db)
+        for job_id in stitch_ready(conn):
+            print(f"Job {job_id} stitched")
+        conn.close()
+    else:
+        conn = connect(args.db)
+        print(json.dumps(status(conn), indent=2, ensure_ascii=False))
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
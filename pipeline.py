@@ -0,0 +1,161 @@
+"""Producer/consumer synthesis pipeline for long documents.
+
+Four threads connected by bounded queues work on different parts of the text
+at once: the frontend normalizes and syllabifies sentence n+2 while units of
+sentence n+1 are prepared, sentence n is concatenated and noised, and the
+previous block is encoded and written to the sink. NumPy and file I/O release
+the GIL, so end-to-end time approaches the slowest stage instead of the sum.
+Full queues block their producer, which keeps memory bounded. The output is
+identical to SynthesisEngine.synthesize_to_sink for the same input.
+"""
+import time
+import queue
+import threading
+
+from engine import get_engine, BOUNDED_CHUNK_CHARS
+from Functions import iter_text_chunks, split_sentences
+from tracing import bind, span
+
+# === Constants ===
+QUEUE_SIZE = 8
+BLOCK_SECONDS = 2
+POLL_SECONDS = 0.1
+
+_DONE = object()
+
+
+class _Stopped(Exception):
+    pass
+
+
+class SynthesisPipeline:
+    """Runs frontend, unit preparation, rendering and writing concurrently"""
+
+    def __init__(self, engine=None, queue_size=QUEUE_SIZE, chunk_chars=BOUNDED_CHUNK_CHARS,
+                 block_seconds=BLOCK_SECONDS, workers=None):
+        self.engine = engine if engine is not None else get_engine()
+        self.queue_size = queue_size
+        self.chunk_chars = chunk_chars
+        self.block_seconds = block_seconds
+        # Frontend processes; with more than one the frontend stage feeds from engine.frontend_parallel
+        self.workers = workers
+        # Seconds each stage spent working (not waiting) in the last run
+        self.busy = {}
+
+    def run(self, parts, sink, seed=None, rate=None, speed=1.0, pauses=None):
+        """Synthesize `parts` (a string or an iterable of paragraphs) into `sink`.
+
+        Returns the number of samples written; an error in any stage stops the
+        others and is raised here.
+        """
+        engine = self.engine
+        stop = threading.Event()
+        errors = []
+        sentences = queue.Queue(self.queue_size)
+        prepared = queue.Queue(self.queue_size)
+        blocks = queue.Queue(self.queue_size)
+        self.busy = {"frontend": 0.0, "prepare": 0.0, "render": 0.0, "write": 0.0}
+        block_samples = int((rate or engine.sample_rate) * self.block_seconds)
+
+        def put(target, item):
+            while not stop.is_set():
+                try:
+                    target.put(item, timeout=POLL_SECONDS)
+                    return
+                except queue.Full:
+                    continue
+            raise _Stopped()
+
+        def take(source, waiting_stage=None):
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = source.get(timeout=POLL_SECONDS)
+                except queue.Empty:
+                    if stop.is_set():
+                        raise _Stopped()
+                    continue
+                finally:
+                    # Time blocked on an empty queue is not work for a stage timed from outside
+                    if waiting_stage is not None:
+                        self.busy[waiting_stage] -= time.perf_counter() - start
+                if item is _DONE:
+                    return
+                yield item
+
+        def timed(stage, items):
+            """Iterate `items`, charging the time spent producing each to `stage`"""
+            items = iter(items)
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    self.busy[stage] += time.perf_counter() - start
+                    return
+                self.busy[stage] += time.perf_counter() - start
+                yield item
+
+        def frontend():
+            if self.workers is not None and self.workers > 1:
+                syllables = engine.frontend_parallel(parts, self.workers, self.chunk_chars)
+                for sentence in timed("frontend", split_sentences(syllables)):
+                    put(sentences, sentence)
+                return
+            for chunk in iter_text_chunks(parts, self.chunk_chars):
+                start = time.perf_counter()
+                sentence_list = list(split_sentences(engine.frontend(chunk)))
+                self.busy["frontend"] += time.perf_counter() - start
+                for sentence in sentence_list:
+                    put(sentences, sentence)
+
+        def prepare():
+            for sentence in take(sentences):
+                start = time.perf_counter()
+                with span("prepare"):
+                    engine.prepare(sentence, 1, rate, speed)
+                self.busy["prepare"] += time.perf_counter() - start
+                put(prepared, sentence)
+
+        def render():
+            syllables = (syl for sentence in take(prepared, "render") for syl in sentence)
+            for block in timed("render", engine.render_blocks(syllables, seed, block_samples, rate, speed, pauses)):
+                put(blocks, block)
+
+        def stage(func, output):
+            try:
+                func()
+                if output is not None:
+                    put(output, _DONE)
+            except _Stopped:
+                pass
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+
+        threads = [
+            threading.Thread(target=bind(stage), args=(frontend, sentences), name="tts-frontend", daemon=True),
+            threading.Thread(target=bind(stage), args=(prepare, prepared), name="tts-prepare", daemon=True),
+            threading.Thread(target=bind(stage), args=(render, blocks), name="tts-render", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        written = 0
+        try:
+            for block in take(blocks):
+                start = time.perf_counter()
+                with span("write"):
+                    sink.write(block)
+                self.busy["write"] += time.perf_counter() - start
+                written += len(block)
+        except _Stopped:
+            pass
+        except BaseException:
+            stop.set()
+            raise
+        finally:
+            for thread in threads:
+                thread.join()
+        if errors:
+            raise errors[0]
+        return written
@@ -0,0 +1,258 @@
+import os
+import json
+import hashlib
+import importlib.util
+from pathlib import Path
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from utils import user_cache_path
+
+
+def has_module(module_name):
+    """Check that an optional dependency is installed without importing it"""
+    return importlib.util.find_spec(module_name) is not None
+
+HAS_PDF = has_module('PyPDF2')
+HAS_DOCX = has_module('docx')
+
+# === Constants ===
+CACHE_DIR = "extract_cache"
+PDF_PAGES_PER_TASK = 8
+PDF_PARALLEL_MIN_PAGES = 16
+HASH_BLOCK_SIZE = 1 << 20
+HEADING_STYLES = ("Title", "Heading")
+
+# One chapter of a book: its title and its text as a list of pages/paragraphs
+Chapter = namedtuple("Chapter", "title parts")
+
+
+def file_fingerprint(file_path):
+    """Stable key for a file: content hash plus modification time"""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    digest.update(str(os.stat(file_path).st_mtime_ns).encode())
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """On-disk cache of extracted document text, one JSON line per page/paragraph"""
+
+    def __init__(self, cache_dir=None):
+        # Under the user cache directory by default, not wherever the app was started
+        self.cache_dir = cache_dir if cache_dir is not None else user_cache_path(CACHE_DIR)
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, f"{key}.jsonl")
+
+    def load(self, key):
+        """Return a generator over cached parts, or None on a cache miss"""
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+        return self._iter_parts(path)
+
+    def _iter_parts(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def store(self, key, parts):
+        """Pass parts through while writing them; the entry is published only when complete"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path_for(key)
+        tmp_path = f"{path}.{os.getpid()}.part"
+        completed = False
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for part in parts:
+                    f.write(json.dumps(part, ensure_ascii=False) + "\n")
+                    yield part
+            completed = True
+        finally:
+            if completed:
+                os.replace(tmp_path, path)
+            elif os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def _extract_pdf_pages(file_path, start, stop):
+    """Worker: extract text of pages [start, stop) in a separate process"""
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(file_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def iter_pdf_pages(file_path, workers=None):
+    """Yield PDF page texts in order, extracting page ranges in a process pool"""
+    if not HAS_PDF:
+        raise ImportError("PyPDF2 is required to open PDF files.")
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(file_path)
+    page_count = len(reader.pages)
+    if workers == 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [
+            executor.submit(_extract_pdf_pages, file_path, start, min(start + PDF_PAGES_PER_TASK, page_count))
+            for start in range(0, page_count, PDF_PAGES_PER_TASK)
+        ]
+        # Results are consumed in submission order, so page 1 is available
+        # as soon as its own batch finishes
+        for future in futures:
+            yield from future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_docx_paragraphs(file_path):
+    """Yield DOCX paragraph texts in order"""
+    if not HAS_DOCX:
+        raise ImportError("python-docx is required to open DOCX files.")
+    import docx
+
+    for para in docx.Document(file_path).paragraphs:
+        yield para.text
+
+
+def iter_text_lines(file_path):
+    """Yield lines of a UTF-8 text file without their line endings"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            yield line.rstrip("\r\n")
+
+
+def iter_document(file_path, cache=None, workers=None):
+    """Yield document text page-by-page (PDF) or paragraph-by-paragraph (DOCX, TXT).
+
+    Joining the parts with newlines gives the full document text. PDF and DOCX
+    extraction results are cached by file hash and mtime.
+    """
+    file_ext = Path(file_path).suffix.lower()
+    if file_ext == '.txt':
+        return _wrap_errors(iter_text_lines(file_path), "text")
+    if file_ext == '.pdf':
+        if not HAS_PDF:
+            raise ImportError("PyPDF2 is required to open PDF files.")
+        parts, kind = iter_pdf_pages(file_path, workers), "PDF"
+    elif file_ext == '.docx':
+        if not HAS_DOCX:
+            raise ImportError("python-docx is required to open DOCX files.")
+        parts, kind = iter_docx_paragraphs(file_path), "DOCX"
+    else:
+        raise ValueError(f"Unsupported file format: {file_ext}")
+
+    cache = cache if cache is not None else ExtractionCache()
+    key = file_fingerprint(file_path)
+    cached = cache.load(key)
+    if cached is not None:
+        return cached
+    return _wrap_errors(cache.store(key, parts), kind)
+
+
+def _wrap_errors(parts, kind):
+    try:
+        yield from parts
+    except ImportError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Could not read {kind} file: {e}")
+
+
+def read_document(file_path, cache=None, workers=None):
+    """Read a whole document into one string"""
+    return "\n".join(iter_document(file_path, cache, workers))
+
+
+def heading_level(style_name):
+    """Outline level of a DOCX paragraph style ("Title" is 0, "Heading 2" is 2), or None"""
+    if style_name == "Title":
+        return 0
+    if style_name.startswith("Heading"):
+        level = style_name[len("Heading"):].strip()
+        return int(level) if level.isdigit() else None
+    return None
+
+
+def docx_chapters(file_path):
+    """Chapters of a DOCX file, split at its highest heading level below the title.
+
+    The heading paragraph starts its chapter, so the title is read aloud too.
+    Text before the first heading becomes an untitled opening chapter.
+    """
+    if not HAS_DOCX:
+        raise ImportError("python-docx is required to open DOCX files.")
+    import docx
+
+    paragraphs = [(heading_level(para.style.name if para.style is not None else ""), para.text)
+                  for para in docx.Document(file_path).paragraphs]
+    levels = [level for level, _ in paragraphs if level]
+    chapter_level = min(levels) if levels else None
+    chapters = []
+    title, parts = None, []
+    for level, text in paragraphs:
+        if chapter_level is not None and level == chapter_level and text.strip():
+            if any(part.strip() for part in parts):
+                chapters.append(Chapter(title, parts))
+            title, parts = text.strip(), []
+        parts.append(text)
+    if any(part.strip() for part in parts):
+        chapters.append(Chapter(title, parts))
+    return chapters
+
+
+def pdf_outline_starts(file_path):
+    """(title, first page) of the top-level PDF outline entries, in page order"""
+    if not HAS_PDF:
+        raise ImportError("PyPDF2 is required to open PDF files.")
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(file_path)
+    starts = []
+    # Nested lists hold the children of the preceding entry
+    for item in reader.outline:
+        if isinstance(item, list):
+            continue
+        try:
+            starts.append((item.title, reader.get_destination_page_number(item)))
+        except Exception:
+            continue
+    return sorted(starts, key=lambda start: start[1])
+
+
+def pdf_chapters(file_path, cache=None, workers=None):
+    """Chapters of a PDF from its outline (bookmarks); pages before the first entry
+    form an untitled opening chapter. Without an outline the book is one chapter."""
+    pages = list(iter_document(file_path, cache, workers))
+    starts = [(title, page) for title, page in pdf_outline_starts(file_path) if 0 <= page < len(pages)]
+    if not starts or starts[0][1] > 0:
+        starts.insert(0, (None, 0))
+    chapters = []
+    for (title, first), (_, last) in zip(starts, starts[1:] + [(None, len(pages))]):
+        # Entries that start on the same page as the next one have no pages of their own
+        if last > first:
+            chapters.append(Chapter(title, pages[first:last]))
+    return [chapter for chapter in chapters if any(part.strip() for part in chapter.parts)]
+
+
+def read_chapters(file_path, cache=None, workers=None):
+    """Chapters of a document: DOCX headings, PDF outline; a TXT file is one chapter"""
+    file_ext = Path(file_path).suffix.lower()
+    try:
+        if file_ext == '.docx':
+            return docx_chapters(file_path)
+        if file_ext == '.pdf':
+            return pdf_chapters(file_path, cache, workers)
+    except (ImportError, ValueError):
+        raise
+    except Exception as e:
+        raise ValueError(f"Could not read chapters of {file_path}: {e}")
+    return [Chapter(None, list(iter_document(file_path, cache, workers)))]
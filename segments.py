@@ -0,0 +1,200 @@
+"""Segmented output with an incrementally updated playlist, HLS style.
+
+synthesize_segmented() renders a text into short WAV segments in a directory
+and rewrites playlist.m3u8 after every segment, so a static file server can
+serve the stream while rendering continues and playback can start after the
+first (shorter) segment. Segments are cut in the middle of a sentence pause
+where one falls near the target duration, otherwise at a word pause, and only
+as a last resort mid-word. Joining the segments gives exactly the audio that
+render() produces for the same seed.
+
+    python segments.py book.txt out/ --target 4
+    python -m http.server --directory out/
+
+The segments are WAV rather than MPEG-TS/AAC (there is no encoder
+dependency), so players need WAV support; the playlist itself follows the
+HLS EVENT playlist format.
+"""
+import os
+import sys
+import math
+import wave
+import argparse
+
+import numpy as np
+
+from engine import get_engine, SentenceCache, SAMPLE_WIDTH, CHANNELS, BOUNDED_CHUNK_CHARS
+from alignment import PAUSE, WORD_END, SENTENCE_END
+
+# === Constants ===
+TARGET_SECONDS = 4
+FIRST_SECONDS = 1
+# Segments may be shorter or longer than the target by this factor to end on a pause
+CUT_SLACK = 0.5
+BLOCK_SECONDS = 0.25
+PLAYLIST = "playlist.m3u8"
+SEGMENT_NAME = "segment_{:05d}.wav"
+
+
+class SegmentWriter:
+    """Sink that cuts the sample stream into segment files and keeps the playlist current"""
+
+    def __init__(self, directory, sample_rate, target_seconds=TARGET_SECONDS, first_seconds=FIRST_SECONDS,
+                 playlist=PLAYLIST):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.target = int(target_seconds * sample_rate)
+        self.first = int(first_seconds * sample_rate) if first_seconds else self.target
+        self.playlist = playlist
+        self.target_duration = math.ceil(target_seconds * (1 + CUT_SLACK))
+        self.pending = []
+        self.buffered = 0
+        # Absolute sample position of the first pending sample
+        self.start = 0
+        # (position, is_sentence) of pauses where a cut sounds natural
+        self.boundaries = []
+        self.segments = []
+        os.makedirs(directory, exist_ok=True)
+        self.write_playlist()
+
+    def boundary(self, position, sentence):
+        if position > self.start:
+            self.boundaries.append((position, sentence))
+
+    def write(self, samples):
+        if len(samples) == 0:
+            return
+        self.pending.append(samples)
+        self.buffered += len(samples)
+        while True:
+            cut = self.choose_cut()
+            if cut is None:
+                break
+            self.emit(cut - self.start)
+
+    def choose_cut(self, final=False):
+        target = self.first if not self.segments else self.target
+        end = self.start + self.buffered
+        if end < self.start + target and not final:
+            return None
+        low = self.start + int(target * (1 - CUT_SLACK))
+        high = self.start + int(target * (1 + CUT_SLACK))
+        goal = self.start + target
+        for sentence_only in (True, False):
+            candidates = [pos for pos, sentence in self.boundaries
+                          if low <= pos <= min(high, end) and (sentence or not sentence_only)]
+            if not candidates:
+                continue
+            best = min(candidates, key=lambda pos: abs(pos - goal))
+            # A closer pause may still be rendered unless the window is complete
+            if best >= goal or end >= high or final:
+                return best
+            return None
+        if end >= high:
+            return goal
+        return None
+
+    def emit(self, length):
+        samples = np.concatenate(self.pending) if len(self.pending) > 1 else self.pending[0]
+        segment, rest = samples[:length], samples[length:]
+        name = SEGMENT_NAME.format(len(self.segments))
+        path = os.path.join(self.directory, name)
+        with wave.open(path + ".part", "wb") as f:
+            f.setnchannels(CHANNELS)
+            f.setsampwidth(SAMPLE_WIDTH)
+            f.setframerate(self.sample_rate)
+            f.writeframes(segment.astype("<i2").tobytes())
+        os.replace(path + ".part", path)
+        self.segments.append((name, length / self.sample_rate))
+        self.start += length
+        self.pending = [rest] if len(rest) else []
+        self.buffered = len(rest)
+        self.boundaries = [(pos, sentence) for pos, sentence in self.boundaries if pos > self.start]
+        self.write_playlist()
+
+    def write_playlist(self, ended=False):
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{self.target_duration}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+        ]
+        for name, seconds in self.segments:
+            lines += [f"#EXTINF:{seconds:.3f},", name]
+        if ended:
+            lines.append("#EXT-X-ENDLIST")
+        # Replace atomically so the server never serves a half-written playlist
+        path = os.path.join(self.directory, self.playlist)
+        with open(path + ".part", "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(path + ".part", path)
+
+    def close(self):
+        while self.buffered:
+            cut = self.choose_cut(final=True)
+            self.emit(self.buffered if cut is None or cut >= self.start + self.buffered else cut - self.start)
+        self.write_playlist(ended=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # After a failed render the partial tail is dropped and the playlist gets no
+        # ENDLIST, so players do not take the truncated stream for a complete one
+        if exc_type is None:
+            self.close()
+
+
+class PauseRecorder:
+    """Takes the place of an Alignment in render_blocks and reports pauses to the writer"""
+
+    def __init__(self, writer):
+        self.writer = writer
+
+    def record(self, token, kind, start, end):
+        if kind == PAUSE and start is not None and token in (WORD_END, SENTENCE_END):
+            # Cut in the middle of the pause; the next unit's crossfade only reaches into its tail
+            self.writer.boundary((start + end) // 2, token == SENTENCE_END)
+
+
+def synthesize_segmented(parts, directory, engine=None, seed=None, rate=None, speed=1.0, pauses=None,
+                         target_seconds=TARGET_SECONDS, first_seconds=FIRST_SECONDS,
+                         chunk_chars=BOUNDED_CHUNK_CHARS, workers=None):
+    """Render a text (a string or an iterable of paragraphs) into segments and a
+    playlist in `directory`; returns the list of (segment name, seconds).
+    With `workers` > 1 the frontend runs in that many processes."""
+    engine = engine if engine is not None else get_engine()
+    sample_rate = rate or engine.sample_rate
+    with SegmentWriter(directory, sample_rate, target_seconds, first_seconds) as writer:
+        blocks = engine.render_blocks(engine.frontend_stream(parts, chunk_chars, workers), seed,
+                                      int(sample_rate * BLOCK_SECONDS), rate, speed, pauses,
+                                      alignment=PauseRecorder(writer), sentence_cache=SentenceCache())
+        for block in blocks:
+            writer.write(block)
+    return writer.segments
+
+
+def main(argv=None):
+    from readers import iter_document
+
+    parser = argparse.ArgumentParser(description="Render a document as segments with an HLS-style playlist")
+    parser.add_argument("document")
+    parser.add_argument("directory")
+    parser.add_argument("--target", type=float, default=TARGET_SECONDS, help="segment length in seconds")
+    parser.add_argument("--first", type=float, default=FIRST_SECONDS, help="length of the first segment")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--rate", type=int, default=None)
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--frontend-workers", type=int, default=None, help="processes for the text frontend")
+    args = parser.parse_args(argv)
+
+    segments = synthesize_segmented(iter_document(args.document), args.directory, seed=args.seed, rate=args.rate,
+                                    speed=args.speed, target_seconds=args.target, first_seconds=args.first,
+                                    workers=args.frontend_workers)
+    print(f"{len(segments)} segments, {sum(seconds for _, seconds in segments):.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
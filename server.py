@@ -0,0 +1,393 @@
+"""Headless HTTP synthesis service.
+
+POST /synthesize with a JSON body {"text": ..., "format": "wav" | "pcm" | "mulaw"
+| "alaw", "rate": 8000, "speed": 1.2, "word_pause_ms": 80, "sentence_pause_ms":
+300} (or a plain-text body and the same fields as query parameters) streams
+audio back with chunked transfer encoding, one chunk per rendered sentence.
+"mulaw" and "alaw" are raw G.711 streams for telephony (8 kHz unless a rate is
+given); without a rate, audio is sent at the unit sample rate. Concurrent requests for the same
+normalized text share one render. GET /health reports load, GET /metrics
+reports request and coalescing counters, and GET /traces/<id> returns the
+per-stage timing breakdown of a recent request (its id is sent in X-Trace-Id).
+"""
+import sys
+import json
+import struct
+import asyncio
+import logging
+import argparse
+from collections import namedtuple
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from Functions import normalize_text, syllabify_normalized, split_sentences
+from engine import get_engine, quantize_speed, SentenceCache, SAMPLE_RATE, SAMPLE_WIDTH, CHANNELS, OUTPUT_RATES
+from dsp import encode
+from singleflight import SingleFlight
+from tracing import trace, span, bind, count, MemorySink, LoggingSink
+
+# === Constants ===
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_CONCURRENT = 4
+MAX_PENDING = 16
+MAX_BODY_SIZE = 1 << 20
+MAX_HEADER_SIZE = 16 << 10
+TRACE_HISTORY = 256
+STREAM_SIZE = 0xFFFFFFFF
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable",
+}
+CONTENT_TYPES = {"wav": "audio/wav", "pcm": "audio/pcm", "mulaw": "audio/PCMU", "alaw": "audio/PCMA"}
+G711_FORMATS = ("mulaw", "alaw")
+G711_RATE = 8000
+MIN_SPEED = 0.5
+MAX_SPEED = 2.0
+MAX_PAUSE_MS = 5000
+
+
+# Output options of one request; hashable, so it is part of the coalescing key
+RenderOptions = namedtuple("RenderOptions", "rate speed word_pause_ms sentence_pause_ms")
+DEFAULT_OPTIONS = RenderOptions(None, 1.0, None, None)
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def wav_stream_header(frame_rate, sample_width, channels):
+    """RIFF/WAVE header for a stream of unknown length"""
+    byte_rate = frame_rate * sample_width * channels
+    return (b"RIFF" + struct.pack("<I", STREAM_SIZE) + b"WAVE"
+            + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, frame_rate, byte_rate,
+                                    sample_width * channels, sample_width * 8)
+            + b"data" + struct.pack("<I", STREAM_SIZE))
+
+
+def normalize_request(text):
+    with span("normalize"):
+        return normalize_text(text)
+
+
+def sentences_of(normalized):
+    """Syllables of normalized text grouped into sentences"""
+    with span("syllabify"):
+        return list(split_sentences(syllabify_normalized(normalized)))
+
+
+class AudioStream:
+    """Chunked audio response whose format is fixed by the first rendered segment"""
+
+    def __init__(self, server, writer, fmt, trace_id=None, rate=None):
+        self.server = server
+        self.writer = writer
+        self.fmt = fmt
+        self.rate = rate
+        self.trace_id = trace_id
+        self.audio_format = None
+
+    @property
+    def started(self):
+        return self.audio_format is not None
+
+    def start(self, audio_format):
+        self.audio_format = audio_format
+        frame_rate, sample_width, channels = audio_format
+        content_type = CONTENT_TYPES[self.fmt]
+        if self.fmt == "pcm":
+            content_type += f";rate={frame_rate};bits={sample_width * 8};channels={channels}"
+        elif self.fmt in G711_FORMATS:
+            content_type += f";rate={frame_rate};channels={channels}"
+        extra = {"X-Trace-Id": self.trace_id} if self.trace_id is not None else {}
+        self.server.write_head(self.writer, 200, content_type, chunked=True, extra_headers=extra)
+        if self.fmt == "wav":
+            self.server.write_raw_chunk(self.writer, wav_stream_header(frame_rate, sample_width, channels))
+
+    async def write(self, audio):
+        if len(audio) == 0:
+            return
+        if not self.started:
+            self.start((audio.frame_rate, audio.sample_width, audio.channels))
+        else:
+            frame_rate, sample_width, channels = self.audio_format
+            audio = audio.set_frame_rate(frame_rate).set_sample_width(sample_width).set_channels(channels)
+        data = audio.raw_data
+        if self.fmt in G711_FORMATS:
+            data = encode(np.frombuffer(data, dtype=np.int16), self.fmt)
+        await self.server.write_chunk(self.writer, data)
+
+    async def finish(self):
+        if not self.started:
+            self.start((self.rate or SAMPLE_RATE, SAMPLE_WIDTH, CHANNELS))
+        await self.server.write_chunk(self.writer, b"")
+
+
+class SynthesisServer:
+    """asyncio HTTP server; CPU stages run in a thread pool so the loop stays responsive"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, max_concurrent=MAX_CONCURRENT,
+                 max_pending=MAX_PENDING, workers=None, engine=None, log_traces=False):
+        self.engine = engine if engine is not None else get_engine()
+        self.traces = MemorySink(maxlen=TRACE_HISTORY)
+        self.trace_sinks = [self.traces, LoggingSink()] if log_traces else [self.traces]
+        self.host = host
+        self.port = port
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=workers or max_concurrent)
+        self.slots = asyncio.Semaphore(max_concurrent)
+        self.pending = 0
+        self.active = 0
+        self.requests = 0
+        self.flight = SingleFlight()
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run_cpu(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, bind(func), *args)
+
+    async def handle(self, reader, writer):
+        try:
+            method, path, query, headers, body = await self.read_request(reader)
+            if path == "/health":
+                await self.send_json(writer, 200, self.health())
+            elif path == "/metrics":
+                await self.send_json(writer, 200, self.metrics())
+            elif path.startswith("/traces/"):
+                await self.send_json(writer, 200, self.trace_report(path[len("/traces/"):]))
+            elif path == "/synthesize":
+                if method != "POST":
+                    raise HTTPError(405, "use POST")
+                text, fmt, options = self.parse_synthesis_request(query, headers, body)
+                await self.synthesize(writer, text, fmt, options)
+            else:
+                raise HTTPError(404, f"unknown path {path}")
+        except HTTPError as e:
+            await self.send_json(writer, e.status, {"error": e.message})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            print(f"Error while streaming response: {e}")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def read_request(self, reader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            raise HTTPError(400, "header too large")
+        if len(head) > MAX_HEADER_SIZE:
+            raise HTTPError(400, "header too large")
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0) or 0)
+        except ValueError:
+            raise HTTPError(400, "invalid Content-Length")
+        if length < 0:
+            raise HTTPError(400, "invalid Content-Length")
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(413, "request body too large")
+        body = await reader.readexactly(length) if length else b""
+        url = urlsplit(target)
+        return method.upper(), url.path, parse_qs(url.query), headers, body
+
+    def parse_synthesis_request(self, query, headers, body):
+        fields = {name: values[0] for name, values in query.items()}
+        fmt = fields.get("format", "wav")
+        if headers.get("content-type", "").startswith("application/json"):
+            try:
+                payload = json.loads(body.decode("utf-8"))
+            except ValueError:
+                raise HTTPError(400, "invalid JSON body")
+            if not isinstance(payload, dict):
+                raise HTTPError(400, "JSON body must be an object")
+            text = payload.get("text", "")
+            fmt = payload.get("format", fmt)
+            if not isinstance(text, str) or not isinstance(fmt, str):
+                raise HTTPError(400, "text and format must be strings")
+            fields.update((name, payload[name]) for name in RenderOptions._fields if name in payload)
+        else:
+            text = body.decode("utf-8", errors="replace")
+        if not text.strip():
+            raise HTTPError(400, "empty text")
+        if fmt not in CONTENT_TYPES:
+            raise HTTPError(400, f"unsupported format {fmt}")
+        if fmt in G711_FORMATS:
+            fields.setdefault("rate", G711_RATE)
+        options = RenderOptions(
+            rate=self.parse_rate(fields),
+            speed=quantize_speed(self.parse_number(fields, "speed", float, MIN_SPEED, MAX_SPEED) or 1.0),
+            word_pause_ms=self.parse_number(fields, "word_pause_ms", int, 0, MAX_PAUSE_MS),
+            sentence_pause_ms=self.parse_number(fields, "sentence_pause_ms", int, 0, MAX_PAUSE_MS),
+        )
+        return text, fmt, options
+
+    def parse_rate(self, fields):
+        rate = self.parse_number(fields, "rate", int, min(OUTPUT_RATES), max(OUTPUT_RATES))
+        if rate is not None and rate not in OUTPUT_RATES:
+            raise HTTPError(400, f"rate must be one of {', '.join(map(str, OUTPUT_RATES))}")
+        return rate
+
+    def parse_number(self, fields, name, kind, low, high):
+        value = fields.get(name)
+        if value is None:
+            return None
+        try:
+            value = kind(value)
+        except (TypeError, ValueError):
+            raise HTTPError(400, f"invalid {name} {value}")
+        if not low <= value <= high:
+            raise HTTPError(400, f"{name} must be between {low} and {high}")
+        return value
+
+    def health(self):
+        return {"status": "ok", "active": self.active, "pending": self.pending}
+
+    def metrics(self):
+        return {"requests": self.requests, "renders": self.flight.stats["leaders"],
+                "coalesced": self.flight.stats["coalesced"], "inflight": len(self.flight.inflight)}
+
+    def trace_report(self, trace_id):
+        try:
+            found = self.traces.find(int(trace_id))
+        except ValueError:
+            found = None
+        if found is None:
+            raise HTTPError(404, f"unknown trace {trace_id}")
+        return found.to_dict()
+
+    async def synthesize(self, writer, text, fmt, options=DEFAULT_OPTIONS):
+        self.requests += 1
+        with trace("synthesize", self.trace_sinks) as request_trace:
+            await self.stream_request(writer, text, fmt, request_trace.id, options)
+
+    async def stream_request(self, writer, text, fmt, trace_id, options=DEFAULT_OPTIONS):
+        stream = AudioStream(self, writer, fmt, trace_id, options.rate)
+        try:
+            normalized = await self.run_cpu(normalize_request, text)
+            key = (normalized, options)
+            if self.flight.joinable(key):
+                count("coalesced")
+            async for audio in self.flight.stream(key, lambda: self.render(normalized, options)):
+                count("bytes_sent", len(audio.raw_data))
+                await stream.write(audio)
+        except HTTPError:
+            raise
+        except Exception as e:
+            # Once the stream has started the only way to signal failure is to drop the connection
+            if not stream.started:
+                raise HTTPError(500, str(e))
+            raise
+        await stream.finish()
+
+    async def render(self, normalized, options=DEFAULT_OPTIONS):
+        """Render normalized text sentence by sentence; runs once per coalesced group"""
+        # Backpressure: refuse new work once the wait queue is full
+        if self.pending >= self.max_pending:
+            raise HTTPError(503, "server busy")
+        self.pending += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.pending -= 1
+        self.active += 1
+        pauses = {token: ms for token, ms in (("<s>", options.word_pause_ms), ("<eos>", options.sentence_pause_ms))
+                  if ms is not None}
+        # Sentences repeated within the request are assembled once
+        cache = SentenceCache()
+        try:
+            for sentence in await self.run_cpu(sentences_of, normalized):
+                yield await self.run_cpu(self.engine.synthesize_syllables, sentence, None, options.rate,
+                                         options.speed, pauses, cache)
+        finally:
+            self.active -= 1
+            self.slots.release()
+
+    def write_head(self, writer, status, content_type, length=None, chunked=False, extra_headers=None):
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", f"Content-Type: {content_type}",
+                 "Connection: close"]
+        lines.extend(f"{name}: {value}" for name, value in (extra_headers or {}).items())
+        if chunked:
+            lines.append("Transfer-Encoding: chunked")
+        else:
+            lines.append(f"Content-Length: {length}")
+        if status == 503:
+            lines.append("Retry-After: 1")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+    def write_raw_chunk(self, writer, data):
+        writer.write(f"{len(data):X}\r\n".encode("latin-1") + data + b"\r\n")
+
+    async def write_chunk(self, writer, data):
+        self.write_raw_chunk(writer, data)
+        # Wait for slow clients before rendering more
+        await writer.drain()
+
+    async def send_json(self, writer, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.write_head(writer, status, "application/json; charset=utf-8", length=len(body))
+        writer.write(body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Georgian TTS synthesis server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-concurrent", type=int, default=MAX_CONCURRENT)
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING)
+    parser.add_argument("--log-traces", action="store_true", help="log the stage breakdown of every request")
+    args = parser.parse_args(argv)
+
+    if args.log_traces:
+        logging.basicConfig(level=logging.INFO)
+    server = SynthesisServer(args.host, args.port, args.max_concurrent, args.max_pending,
+                             log_traces=args.log_traces)
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
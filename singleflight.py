@@ -0,0 +1,142 @@
+"""Single-flight coalescing of identical concurrent requests.
+
+The first caller for a key (the leader) starts the work; callers arriving while
+it is in flight wait on the same task and receive the same result. Work runs
+in its own task, so a cancelled caller never cancels the shared render.
+
+A shared stream runs at most STREAM_WINDOW items ahead of its slowest
+subscriber, so a slow client slows the render instead of growing a buffer,
+and it is cancelled once its last subscriber is gone.
+"""
+import asyncio
+from collections import deque
+
+# === Constants ===
+# Items a shared stream may run ahead of its slowest subscriber; also how far back a late joiner can replay
+STREAM_WINDOW = 16
+
+
+class SingleFlight:
+    """Coalesces concurrent async calls that share a key"""
+
+    def __init__(self):
+        self.inflight = {}
+        self.stats = {"leaders": 0, "coalesced": 0}
+
+    def joinable(self, key):
+        entry = self.inflight.get(key)
+        return entry is not None and entry.joinable()
+
+    def _join(self, key, start):
+        if self.joinable(key):
+            self.stats["coalesced"] += 1
+            return self.inflight[key]
+        entry = start()
+        self.inflight[key] = entry
+        self.stats["leaders"] += 1
+
+        def finished(_):
+            # A later run may have replaced this one under the same key
+            if self.inflight.get(key) is entry:
+                del self.inflight[key]
+
+        entry.task.add_done_callback(finished)
+        return entry
+
+    async def do(self, key, func):
+        """Return the result of `await func()`, shared with concurrent callers of `key`"""
+        entry = self._join(key, lambda: _Call(asyncio.ensure_future(func())))
+        return await asyncio.shield(entry.task)
+
+    async def stream(self, key, produce):
+        """Iterate the items of the async iterator `produce()`, shared with concurrent callers of `key`.
+
+        Late joiners replay every item produced so far and then follow live;
+        once items have been dropped from the window, a caller starts a new run.
+        """
+        entry = self._join(key, lambda: _Broadcast(produce()))
+        token = entry.add_subscriber()
+        try:
+            async for item in entry.subscribe(token):
+                yield item
+        finally:
+            entry.remove_subscriber(token)
+
+
+class _Call:
+    def __init__(self, task):
+        self.task = task
+
+    def joinable(self):
+        return True
+
+
+class _Broadcast:
+    """Runs one async iterator and fans its items out to any number of subscribers"""
+
+    def __init__(self, source, window=STREAM_WINDOW):
+        self.items = deque()
+        # Index of items[0] in the stream; earlier items were read by every subscriber and dropped
+        self.base = 0
+        self.window = window
+        # Subscriber token -> index of the next item it reads
+        self.positions = {}
+        self.done = False
+        self.closed = False
+        self.changed = asyncio.Condition()
+        self.advanced = asyncio.Event()
+        self.task = asyncio.ensure_future(self._pump(source))
+
+    def joinable(self):
+        return self.base == 0 and not self.closed
+
+    def add_subscriber(self):
+        token = object()
+        self.positions[token] = self.base
+        return token
+
+    def remove_subscriber(self, token):
+        del self.positions[token]
+        if not self.positions and not self.done:
+            # Nobody is listening any more: stop rendering and free the slot
+            self.closed = True
+            self.task.cancel()
+        self.advanced.set()
+
+    def _end(self):
+        return self.base + len(self.items)
+
+    def _unread(self):
+        return self._end() - min(self.positions.values(), default=self._end())
+
+    async def _pump(self, source):
+        try:
+            async for item in source:
+                async with self.changed:
+                    self.items.append(item)
+                    slowest = min(self.positions.values(), default=self._end())
+                    while len(self.items) > self.window and self.base < slowest:
+                        self.items.popleft()
+                        self.base += 1
+                    self.changed.notify_all()
+                # Backpressure: do not render further ahead of the slowest subscriber than the window
+                while self._unread() >= self.window:
+                    self.advanced.clear()
+                    await self.advanced.wait()
+        finally:
+            async with self.changed:
+                self.done = True
+                self.changed.notify_all()
+
+    async def subscribe(self, token):
+        while True:
+            async with self.changed:
+                await self.changed.wait_for(lambda: self.positions[token] < self._end() or self.done)
+                if self.positions[token] == self._end():
+                    break
+                item = self.items[self.positions[token] - self.base]
+            yield item
+            self.positions[token] += 1
+            self.advanced.set()
+        # Surface the producer's exception to every subscriber
+        await asyncio.shield(self.task)
@@ -0,0 +1,291 @@
+"""Lightweight per-request tracing for the synthesis pipeline.
+
+A request opens a trace with `with trace("name"):`; code inside records stages
+with `with span("stage"):` or `@traced("stage")` and bumps counters with
+`count("units_resolved")`. Outside a trace these calls only look up a context
+variable and return, so instrumentation costs nothing when tracing is off.
+Finished traces are handed to sinks (logging, Chrome JSON trace file, memory).
+A trace opened with memory=True also records the tracemalloc peak of each span.
+"""
+import os
+import json
+import time
+import logging
+import threading
+import itertools
+import contextvars
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+_current = contextvars.ContextVar("synthesis_trace", default=None)
+_ids = itertools.count(1)
+_sinks = []
+
+logger = logging.getLogger("tts.trace")
+
+
+class Trace:
+    """Spans and counters recorded for one request; safe to update from several threads"""
+
+    def __init__(self, name, memory=False):
+        self.id = next(_ids)
+        self.name = name
+        self.memory = memory
+        self.peaks = {}
+        self.start = time.perf_counter()
+        self.wall_start = time.time()
+        self.duration = None
+        self.spans = []
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def add_span(self, name, start, duration):
+        with self.lock:
+            self.spans.append((name, start, duration, threading.get_ident()))
+
+    def add_peak(self, name, peak_bytes):
+        with self.lock:
+            self.peaks[name] = max(self.peaks.get(name, 0), peak_bytes)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.start
+
+    def breakdown(self):
+        """Total milliseconds and call count per span name, in first-seen order"""
+        totals = {}
+        with self.lock:
+            for name, _, duration, _ in self.spans:
+                entry = totals.setdefault(name, {"ms": 0.0, "calls": 0})
+                entry["ms"] += duration * 1000
+                entry["calls"] += 1
+            for name, peak in self.peaks.items():
+                if name in totals:
+                    totals[name]["peak_kb"] = peak / 1024
+        return totals
+
+    def summary(self):
+        parts = [
+            f"{name} {entry['ms']:.1f} ms" + (f" / {entry['peak_kb'] / 1024:.1f} MB" if "peak_kb" in entry else "")
+            for name, entry in self.breakdown().items()
+        ]
+        if self.duration is not None and not self.memory:
+            parts.append(f"total {self.duration * 1000:.1f} ms")
+        return " | ".join(parts)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "peak_kb": self.peaks["total"] / 1024 if "total" in self.peaks else None,
+            "duration_ms": self.duration * 1000 if self.duration is not None else None,
+            "stages": self.breakdown(),
+            "counters": dict(self.counters),
+        }
+
+
+class _Span:
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.add_span(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_SPAN = _NullSpan()
+
+_memory_stack = threading.local()
+
+
+class _MemorySpan(_Span):
+    """Span that also records the tracemalloc peak above its starting allocation.
+
+    tracemalloc has one process-wide peak, so nested spans fold their peak into
+    the enclosing span before resetting it.
+    """
+    __slots__ = ("base", "peak")
+
+    def __enter__(self):
+        stack = _memory_stack.__dict__.setdefault("spans", [])
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1].peak = max(stack[-1].peak, peak)
+        tracemalloc.reset_peak()
+        self.base = current
+        self.peak = current
+        stack.append(self)
+        return super().__enter__()
+
+    def __exit__(self, *exc):
+        super().__exit__(*exc)
+        stack = _memory_stack.spans
+        stack.pop()
+        self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+        self.trace.add_peak(self.name, self.peak - self.base)
+        if stack:
+            stack[-1].peak = max(stack[-1].peak, self.peak)
+        return False
+
+
+def current_trace():
+    return _current.get()
+
+
+def span(name):
+    """Context manager timing one stage of the current trace"""
+    active = _current.get()
+    if active is None:
+        return NULL_SPAN
+    return _MemorySpan(active, name) if active.memory else _Span(active, name)
+
+
+def count(name, n=1):
+    """Increment a counter of the current trace"""
+    active = _current.get()
+    if active is not None:
+        active.count(name, n)
+
+
+def traced(name=None):
+    """Decorator recording each call of a function as a span"""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            active = _current.get()
+            if active is None:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def bind(func):
+    """Carry the current trace into a function that will run on another thread"""
+    active = _current.get()
+    if active is None:
+        return func
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _current.set(active)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return wrapper
+
+
+@contextmanager
+def trace(name, sinks=None, memory=False):
+    """Record a trace for the enclosed request and emit it to the sinks when done.
+
+    With memory=True, tracemalloc is started if needed and every span also
+    records its peak allocation; the whole request is recorded as span "total".
+    """
+    active = Trace(name, memory)
+    started_tracemalloc = memory and not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    token = _current.set(active)
+    try:
+        if memory:
+            with _MemorySpan(active, "total"):
+                yield active
+        else:
+            yield active
+    finally:
+        _current.reset(token)
+        active.finish()
+        if started_tracemalloc:
+            tracemalloc.stop()
+        for sink in (sinks if sinks is not None else _sinks):
+            sink.emit(active)
+
+
+def add_sink(sink):
+    """Register a sink that receives every trace opened without explicit sinks"""
+    _sinks.append(sink)
+    return sink
+
+
+def remove_sink(sink):
+    _sinks.remove(sink)
+
+
+class LoggingSink:
+    def __init__(self, log=logger, level=logging.INFO):
+        self.log = log
+        self.level = level
+
+    def emit(self, trace):
+        self.log.log(self.level, "%s #%d: %s | %s", trace.name, trace.id, trace.summary(),
+                     ", ".join(f"{k}={v}" for k, v in trace.counters.items()))
+
+
+class MemorySink:
+    """Keeps the most recent traces, e.g. for tests, a status bar or a /traces endpoint"""
+
+    def __init__(self, maxlen=None):
+        self.traces = deque(maxlen=maxlen)
+
+    def emit(self, trace):
+        self.traces.append(trace)
+
+    def find(self, trace_id):
+        for item in reversed(self.traces):
+            if item.id == trace_id:
+                return item
+        return None
+
+
+class JsonTraceSink:
+    """Appends spans to a Chrome trace-event file (open in chrome://tracing or Perfetto)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def emit(self, trace):
+        pid = os.getpid()
+        base = trace.wall_start * 1e6 - trace.start * 1e6
+        events = [
+            {"name": name, "cat": trace.name, "ph": "X", "ts": base + start * 1e6, "dur": duration * 1e6,
+             "pid": pid, "tid": tid, "args": {"trace": trace.id}}
+            for name, start, duration, tid in trace.spans
+        ]
+        if trace.counters:
+            events.append({"name": f"{trace.name} counters", "ph": "C", "ts": base + trace.start * 1e6,
+                           "pid": pid, "args": dict(trace.counters)})
+        with self.lock:
+            new_file = not os.path.exists(self.path)
+            with open(self.path, "a", encoding="utf-8") as f:
+                # The trace-event array format allows the closing bracket to be omitted
+                if new_file:
+                    f.write("[\n")
+                for event in events:
+                    f.write(json.dumps(event) + ",\n")
@@ -7,4 +7,17 @@ def resource_path(relative_path):
         base_path = sys._MEIPASS
     else:
         base_path = os.path.abspath(".")
-    return os.path.join(base_path, relative_path) 
\ No newline at end of file
+    return os.path.join(base_path, relative_path) 
+
+APP_NAME = "GeorgianTTS"
+
+
+def user_cache_path(relative_path):
+    """ Get absolute path in the per-user cache directory, independent of the working directory """
+    if sys.platform == "win32":
+        base_path = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Local")
+    elif sys.platform == "darwin":
+        base_path = os.path.join(os.path.expanduser("~"), "Library", "Caches")
+    else:
+        base_path = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base_path, APP_NAME, relative_path)